@@ -0,0 +1,95 @@
+# LSTM/chord_engine/beam_search.py
+"""
+LSTM 다음-코드 분포로 진행을 직접 생성하는 배치 빔 서치.
+시드 루트 3개로 상태를 만든 뒤, 매 스텝 모든 빔을 한 번의 model.step 으로 확장한다.
+룰(키 안의 루트 / 장르 퀄리티 정책)은 log-prob 에 더하는 prior 보너스로 반영.
+
+결과는 generate_topk(extra_cands=...) 로 넘겨 룰 점수 + 모델 점수로 다시 랭킹한다.
+"""
+from typing import List, Tuple
+import torch
+
+from .smart_progression import (
+    MAJOR_SCALE,
+    infer_key,
+    pc_of,
+    rel_pc,
+    deg_major,
+    quality_policy_for_genre,
+    quality_suffix,
+    _root_of,
+)
+
+
+def _rule_prior(index_to_chord, vocab_size: int, key_root: str, genre: str) -> torch.Tensor:
+    """vocab 토큰별 룰 보너스: 키 안의 루트 +1.0, 그 도수의 장르 퀄리티와 일치 +0.5."""
+    qf = quality_policy_for_genre(genre)
+    kpc = pc_of(key_root)
+    prior = torch.zeros(vocab_size)
+    for i in range(vocab_size):
+        ch = index_to_chord.get(i)
+        if not ch:
+            continue
+        root = _root_of(ch)
+        rpc = pc_of(root)
+        if rpc is None:
+            continue
+        rel = rel_pc(rpc, kpc)
+        if rel not in MAJOR_SCALE:
+            continue
+        bonus = 1.0
+        if ch[len(root):] == quality_suffix(qf(deg_major(rel))):
+            bonus += 0.5
+        prior[i] = bonus
+    return prior
+
+
+def beam_search_progressions(
+    model,
+    chord_to_index,
+    index_to_chord,
+    genre: str,
+    seed_roots: List[str],
+    beam_width: int = 16,
+    length: int = 8,
+    prior_weight: float = 0.5,
+) -> List[Tuple[List[str], float]]:
+    """
+    시드(루트 토큰) 이후를 빔 서치로 채워 length 코드 진행 beam_width 개를 반환.
+    점수 = 평균 (log p + prior_weight * prior), 내림차순.
+    """
+    seed_ids = [chord_to_index.get(r, 0) for r in seed_roots]
+    if not seed_ids or length <= len(seed_ids) or beam_width <= 0:
+        return []
+
+    key_root, _ = infer_key(seed_roots)
+    with torch.no_grad():
+        logits, state = None, None
+        for tok in seed_ids:
+            logits, state = model.step(torch.tensor([tok], dtype=torch.long), state)
+        vocab_size = logits.shape[1]
+        prior = prior_weight * _rule_prior(index_to_chord, vocab_size, key_root, genre)
+
+        seqs: List[List[int]] = [list(seed_ids)]
+        scores = torch.zeros(1)
+        n_new = length - len(seed_ids)
+        for t in range(n_new):
+            step_scores = torch.log_softmax(logits, dim=1) + prior   # [B, V]
+            total = (scores.unsqueeze(1) + step_scores).reshape(-1)
+            top = torch.topk(total, k=min(beam_width, total.numel()))
+            parents = torch.div(top.indices, vocab_size, rounding_mode="floor")
+            tokens = top.indices % vocab_size
+
+            seqs = [seqs[p] + [tok] for p, tok in zip(parents.tolist(), tokens.tolist())]
+            scores = top.values
+            if t < n_new - 1:
+                # 살아남은 빔들의 상태를 모아 한 번의 배치 forward
+                state = (state[0][:, parents], state[1][:, parents])
+                logits, state = model.step(tokens, state)
+
+    out = []
+    for seq, sc in zip(seqs, (scores / n_new).tolist()):
+        chords = [index_to_chord.get(i, seed_roots[0]) for i in seq]
+        chords[:len(seed_roots)] = list(seed_roots)
+        out.append((chords, float(sc)))
+    return out
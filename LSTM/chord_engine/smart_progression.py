@@ -277,21 +277,43 @@ def generate_topk(
     k: int = 3,
     scorer: Optional[Callable[[List[str]], float]] = None,
     alpha: float = 0.6,
+    batch_scorer: Optional[Callable[[List[List[str]]], List[float]]] = None,
+    extra_cands: Optional[List[List[str]]] = None,
 ) -> List[Tuple[List[str], float]]:
+    """
+    scorer: 진행 1개 → 모델 점수(0~1)
+    batch_scorer: 진행 리스트 → 모델 점수 리스트. 주어지면 scorer 대신 후보 전체를 한 번에 채점.
+    extra_cands: 룰 템플릿 외 추가 후보(예: beam_search 결과). 같은 룰/모델 점수로 함께 랭킹.
+    """
     key_root, cands = _generate_rule_candidates(genre, seed_roots, steps=steps)
+    if extra_cands:
+        seen = {tuple(c) for c in cands}
+        for c in extra_cands:
+            t = tuple(c)
+            if c and t not in seen:
+                cands.append(list(c)); seen.add(t)
 
     # 간단 로만 수치화(룰 점수 계산용)
     def roman_of(chords: List[str]) -> List[int]:
         roots = [_root_of(ch) for ch in chords]
         return romanize_major(roots, key_root)
 
+    model_scores: Optional[List[float]] = None
+    if batch_scorer is not None:
+        try:
+            model_scores = [float(x) for x in batch_scorer(cands)]
+        except Exception:
+            model_scores = [0.0] * len(cands)
+
     ranked: List[Tuple[List[str], float]] = []
-    for seq in cands:
+    for i, seq in enumerate(cands):
         r = roman_of(seq)
         if genre=="jazz": rule_score = _jazz_rule_score(r, seq)
         elif genre=="pop": rule_score = _pop_rule_score(r, seq)
         else: rule_score = _rock_rule_score(r, seq)
-        if scorer is not None:
+        if model_scores is not None:
+            final = alpha * rule_score + (1.0 - alpha) * model_scores[i]
+        elif scorer is not None:
             try:
                 model_score = float(scorer(seq))
             except Exception:
@@ -302,4 +324,4 @@ def generate_topk(
         ranked.append((seq, final))
 
     ranked.sort(key=lambda x: x[1], reverse=True)
-    return ranked[:k]
\ No newline at end of file
+    return ranked[:k]
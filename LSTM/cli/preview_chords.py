@@ -1,6 +1,5 @@
 # LSTM/predict_next_chord.py
 import os, sys, json, re
-import numpy as np
 import torch
 from typing import List, Tuple, Optional
 
@@ -13,6 +12,7 @@ if PROJ_ROOT not in sys.path:
 
 # 내부 모듈
 from LSTM.model.train_lstm import ChordLSTM
+from LSTM.model.vocab import load_vocab_dir
 from LSTM.harmony_score import evaluate_progression  # 0~1 평균 확률
 from LSTM.chord_engine.smart_progression import generate_topk  # 룰 후보 + (옵션)모델 스코어 블렌딩
 
@@ -54,8 +54,7 @@ def load_model_and_vocab(genre: str):
     """모델과 vocab 로드. 실패 시 (None, None, None) 반환."""
     try:
         base = BASE_DIRS[genre]
-        chord_to_index = np.load(os.path.join(base, "chord_to_index.npy"), allow_pickle=True).item()
-        index_to_chord = np.load(os.path.join(base, "index_to_chord.npy"), allow_pickle=True).item()
+        chord_to_index, index_to_chord = load_vocab_dir(base)   # vocab.bin 우선, 없으면 레거시 .npy
 
         model = ChordLSTM(len(chord_to_index))
         state = torch.load(os.path.join(base, "chord_lstm.pt"), map_location=torch.device("cpu"))
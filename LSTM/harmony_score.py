@@ -26,6 +26,38 @@ def evaluate_progression(model, progression, chord_to_index, index_to_chord):
     return avg_score  #  0~1 사이 확률값
 
 
+def evaluate_progressions_batch(model, progressions, chord_to_index, index_to_chord):
+    """
+    여러 진행을 한 번에 채점하는 배치 버전.
+    모든 후보의 슬라이딩 윈도우를 [N, 3] 인덱스 텐서 하나로 모아 forward/softmax 1회로 처리하고,
+    각 진행별 평균 확률 리스트를 반환한다. (evaluate_progression 과 동일한 값)
+    """
+    window_size = 3
+    windows, targets, owners = [], [], []
+    for pi, progression in enumerate(progressions):
+        idx = [chord_to_index.get(c, 0) for c in progression]
+        for i in range(window_size, len(idx)):
+            windows.append(idx[i - window_size:i])
+            targets.append(idx[i])
+            owners.append(pi)
+
+    if not windows:
+        return [0.0] * len(progressions)
+
+    input_tensor = torch.tensor(windows, dtype=torch.long)
+    with torch.no_grad():
+        output = model(input_tensor)
+        softmax_probs = torch.softmax(output, dim=1)
+    target_tensor = torch.tensor(targets, dtype=torch.long)
+    probs = softmax_probs.gather(1, target_tensor.unsqueeze(1)).squeeze(1)
+
+    # 진행별 평균 (index_add 로 합산 후 윈도우 개수로 나눔, 윈도우가 없으면 0)
+    owner_tensor = torch.tensor(owners, dtype=torch.long)
+    sums = torch.zeros(len(progressions), dtype=probs.dtype).index_add_(0, owner_tensor, probs)
+    counts = torch.zeros(len(progressions), dtype=probs.dtype).index_add_(0, owner_tensor, torch.ones_like(probs))
+    return (sums / counts.clamp(min=1)).tolist()
+
+
 def interpret_score(score):
     if score >= 0.7:
         return "정석 진행"
@@ -34,4 +66,101 @@ def interpret_score(score):
     elif score >= 0.45:
         return "비교적 많이 쓰임"
     else:
-        return "특이/실험적 진행"
\ No newline at end of file
+        return "특이/실험적 진행"
+
+# --- 스트리밍(증분) 채점: prefix 트라이에 LSTM 상태 캐시 ---
+class _TrieNode:
+    __slots__ = ("children", "state", "probs")
+
+    def __init__(self, state=None, probs=None):
+        self.children = {}
+        self.state = state    # (h, c), 각 [num_layers, 1, hidden]
+        self.probs = probs    # 이 prefix 다음 코드의 softmax 분포 [vocab]
+
+
+class PrefixStateTrie:
+    """
+    토큰 prefix → LSTM (h, c) 상태/다음 코드 분포 캐시.
+    같은 prefix(겹치는 윈도우, 템플릿 회전의 공통 앞부분)는 한 번만 계산된다.
+    여러 요청에서 공유하려면 같은 인스턴스를 넘기면 된다(모델별로 따로 둘 것).
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    def ensure(self, model, paths):
+        """paths(토큰 인덱스 튜플들)가 모두 트라이에 있도록 깊이별로 배치 확장."""
+        max_len = max((len(p) for p in paths), default=0)
+        for depth in range(max_len):
+            parents, tokens, pending = [], [], set()
+            for p in paths:
+                if len(p) <= depth:
+                    continue
+                node = self._node(p[:depth])
+                tok = p[depth]
+                if tok in node.children or (id(node), tok) in pending:
+                    continue
+                pending.add((id(node), tok))
+                parents.append(node)
+                tokens.append(tok)
+            if not tokens:
+                continue
+
+            if depth == 0:
+                state = None
+            else:
+                state = (
+                    torch.cat([n.state[0] for n in parents], dim=1),
+                    torch.cat([n.state[1] for n in parents], dim=1),
+                )
+            with torch.no_grad():
+                logits, (h_n, c_n) = model.step(torch.tensor(tokens, dtype=torch.long), state)
+                probs = torch.softmax(logits, dim=1)
+            for j, (node, tok) in enumerate(zip(parents, tokens)):
+                node.children[tok] = _TrieNode(
+                    state=(h_n[:, j:j + 1], c_n[:, j:j + 1]),
+                    probs=probs[j],
+                )
+            self.size += len(tokens)
+
+    def probs_of(self, path):
+        return self._node(path).probs
+
+    def _node(self, path):
+        node = self.root
+        for tok in path:
+            node = node.children[tok]
+        return node
+
+
+def evaluate_progressions_incremental(model, progressions, chord_to_index, index_to_chord,
+                                      mode="stream", trie=None):
+    """
+    prefix 트라이로 LSTM 상태를 재사용하는 채점.
+    - mode="window": 각 3코드 윈도우를 영상태에서 시작 → evaluate_progression 과 같은 확률
+                     (윈도우 prefix 가 겹치는 만큼만 재사용)
+    - mode="stream": 진행 처음부터 상태를 이어감 → 코드당 LSTM 1스텝, 후보 간 공통 prefix 공유
+    채점 대상 위치는 두 모드 모두 4번째 코드부터(윈도우 채점과 동일).
+    """
+    window_size = 3
+    trie = trie if trie is not None else PrefixStateTrie()
+
+    queries = []  # (진행 번호, prefix, target)
+    for pi, progression in enumerate(progressions):
+        idx = [chord_to_index.get(c, 0) for c in progression]
+        for i in range(window_size, len(idx)):
+            start = i - window_size if mode == "window" else 0
+            queries.append((pi, tuple(idx[start:i]), idx[i]))
+
+    if not queries:
+        return [0.0] * len(progressions)
+
+    trie.ensure(model, [q[1] for q in queries])
+
+    sums = [0.0] * len(progressions)
+    counts = [0] * len(progressions)
+    for pi, path, target in queries:
+        sums[pi] += float(trie.probs_of(path)[target])
+        counts[pi] += 1
+    return [s / c if c else 0.0 for s, c in zip(sums, counts)]
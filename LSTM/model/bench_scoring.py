@@ -0,0 +1,58 @@
+# LSTM/model/bench_scoring.py
+"""
+predict_top_k 와 같은 채점 워크로드(시드별 generate_topk 후보 64개)를 백엔드별로 측정하는 마이크로 벤치마크.
+
+사용: python LSTM/model/bench_scoring.py --genre rock [--repeat 20]
+"""
+import os, sys, time
+
+THIS_FILE = os.path.abspath(__file__)
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(THIS_FILE)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+import torch
+
+from LSTM.predict_next_chord import BASE_DIRS, load_vocab, load_eager_model, load_torchscript_model
+from LSTM.harmony_score import evaluate_progression, evaluate_progressions_batch
+from LSTM.chord_engine.smart_progression import _generate_rule_candidates
+
+SEEDS = [["C", "G", "A"], ["D", "G", "A"], ["E", "A", "B"], ["F", "Bb", "C"], ["A", "D", "E"]]
+
+def _workload(genre: str):
+    """시드별 후보 진행 리스트(generate_topk 가 scorer 에 넘기는 것과 동일)."""
+    return [_generate_rule_candidates(genre, seed)[1] for seed in SEEDS]
+
+def _time(fn, repeat: int) -> float:
+    fn()  # 워밍업
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000.0
+
+def bench(genre: str, repeat: int = 20) -> None:
+    base = BASE_DIRS[genre]
+    c2i, i2c = load_vocab(base)
+    models = {"eager": load_eager_model(base, len(c2i))}
+    ts = load_torchscript_model(base)
+    if ts is not None:
+        models["torchscript"] = ts
+    else:
+        print("ℹ️ TorchScript 모델 없음 (export_lstm.py 먼저 실행)")
+
+    pools = _workload(genre)
+    n_cands = sum(len(p) for p in pools)
+    print(f"[{genre}] seeds={len(pools)} candidates={n_cands} threads={torch.get_num_threads()}")
+    for name, model in models.items():
+        per_window = _time(lambda: [evaluate_progression(model, s, c2i, i2c) for p in pools for s in p], repeat)
+        batched = _time(lambda: [evaluate_progressions_batch(model, p, c2i, i2c) for p in pools], repeat)
+        print(f"  {name:<12} evaluate_progression: {per_window:8.2f} ms   batch: {batched:8.2f} ms")
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="ChordLSTM scoring micro-benchmark")
+    ap.add_argument("--genre", type=str, default="rock", choices=list(BASE_DIRS.keys()))
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    bench(args.genre, repeat=args.repeat)
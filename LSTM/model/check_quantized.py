@@ -0,0 +1,72 @@
+# LSTM/model/check_quantized.py
+"""
+동적 int8 양자화 모델이 fp32 모델과 같은 top-k 랭킹을 내는지 확인하고, 채점 시간/가중치 크기를 비교한다.
+held-out 시드 셋: 12^3 루트 시드에서 고정 시드로 표본 추출.
+
+사용: python LSTM/model/check_quantized.py --genre jazz [--n-seeds 200] [--k 8]
+랭킹이 하나라도 다르면 종료 코드 1.
+"""
+import io, os, sys, time, random
+from itertools import product
+
+THIS_FILE = os.path.abspath(__file__)
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(THIS_FILE)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+import torch
+
+from LSTM.predict_next_chord import BASE_DIRS, load_vocab, load_eager_model, quantize_model
+from LSTM.harmony_score import evaluate_progressions_batch
+from LSTM.chord_engine.smart_progression import generate_topk, ABS
+
+def _state_bytes(model) -> int:
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell()
+
+def heldout_seeds(n: int, seed: int = 1234):
+    roots = [ABS[i] for i in range(12)]
+    all_seeds = [list(s) for s in product(roots, repeat=3)]
+    return random.Random(seed).sample(all_seeds, min(n, len(all_seeds)))
+
+def check(genre: str, n_seeds: int = 200, k: int = 8) -> bool:
+    base = BASE_DIRS[genre]
+    c2i, i2c = load_vocab(base)
+    fp32 = load_eager_model(base, len(c2i))
+    int8 = quantize_model(load_eager_model(base, len(c2i)))
+
+    def ranking(model, seed_roots):
+        pool = generate_topk(
+            genre=genre, seed_roots=seed_roots, k=k, alpha=0.5,
+            batch_scorer=lambda seqs: evaluate_progressions_batch(model, seqs, c2i, i2c),
+        )
+        return [tuple(s) for s, _ in pool]
+
+    seeds = heldout_seeds(n_seeds)
+    elapsed = {"fp32": 0.0, "int8": 0.0}
+    mismatches = []
+    for seed_roots in seeds:
+        t0 = time.perf_counter(); r32 = ranking(fp32, seed_roots); t1 = time.perf_counter()
+        r8 = ranking(int8, seed_roots); t2 = time.perf_counter()
+        elapsed["fp32"] += t1 - t0
+        elapsed["int8"] += t2 - t1
+        if r32 != r8:
+            mismatches.append(seed_roots)
+
+    print(f"[{genre}] seeds={len(seeds)} top-{k} 랭킹 일치: {len(seeds) - len(mismatches)}/{len(seeds)}")
+    for seed_roots in mismatches[:10]:
+        print(f"  ✗ {seed_roots}")
+    print(f"  weights  fp32: {_state_bytes(fp32) / 1024:.1f} KiB   int8: {_state_bytes(int8) / 1024:.1f} KiB")
+    print(f"  scoring  fp32: {elapsed['fp32'] * 1000:.1f} ms   int8: {elapsed['int8'] * 1000:.1f} ms")
+    return not mismatches
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Check int8 dynamic quantized ChordLSTM against fp32")
+    ap.add_argument("--genre", type=str, default="rock", choices=list(BASE_DIRS.keys()))
+    ap.add_argument("--n-seeds", type=int, default=200)
+    ap.add_argument("--k", type=int, default=8)
+    args = ap.parse_args()
+    sys.exit(0 if check(args.genre, n_seeds=args.n_seeds, k=args.k) else 1)
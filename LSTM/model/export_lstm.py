@@ -0,0 +1,59 @@
+# LSTM/model/export_lstm.py
+"""
+장르별 ChordLSTM 을 TorchScript 로 내보낸다(forward + step).
+predict_next_chord.load_model_and_vocab 은 chord_lstm.ts.pt 가 있으면 이를 우선 사용한다.
+
+사용: python LSTM/model/export_lstm.py [--genres rock,jazz,pop] [--out-root DIR]
+"""
+import os, sys, shutil
+
+THIS_FILE = os.path.abspath(__file__)
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(THIS_FILE)))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+import torch
+
+from LSTM.predict_next_chord import BASE_DIRS, TORCHSCRIPT_FILE, load_vocab, load_eager_model
+from LSTM.model.vocab import VOCAB_FILE, LEGACY_FILES
+
+VOCAB_FILES = (VOCAB_FILE, *LEGACY_FILES)
+
+def export_torchscript(base_dir: str, out_dir: str = None) -> str:
+    """eager 체크포인트 → 스크립트/freeze 된 TorchScript 모듈. out_dir 이 다르면 vocab 도 함께 복사."""
+    out_dir = out_dir or base_dir
+    os.makedirs(out_dir, exist_ok=True)
+
+    c2i, _ = load_vocab(base_dir)
+    model = load_eager_model(base_dir, len(c2i))
+    scripted = torch.jit.script(model)
+    scripted = torch.jit.freeze(scripted.eval(), preserved_attrs=["step"])
+
+    # eager 와 출력이 같은지 확인
+    probe = torch.randint(0, len(c2i), (8, 3), dtype=torch.long)
+    with torch.no_grad():
+        if not torch.allclose(model(probe), scripted(probe), atol=1e-5):
+            raise RuntimeError(f"TorchScript 출력 불일치: {base_dir}")
+
+    out_path = os.path.join(out_dir, TORCHSCRIPT_FILE)
+    scripted.save(out_path)
+    if os.path.abspath(out_dir) != os.path.abspath(base_dir):
+        for fn in VOCAB_FILES:
+            if not os.path.exists(os.path.join(base_dir, fn)):
+                continue
+            shutil.copy2(os.path.join(base_dir, fn), os.path.join(out_dir, fn))
+    print(f"[{os.path.basename(base_dir)}] ✅ TorchScript 저장: {out_path}")
+    return out_path
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Export ChordLSTM to TorchScript")
+    ap.add_argument("--genres", type=str, default=",".join(BASE_DIRS.keys()))
+    ap.add_argument("--out-root", type=str, default=None,
+                    help="지정하면 <out-root>/<genre>/ 에 모델+vocab 저장 (기본: 원본 모델 폴더)")
+    args = ap.parse_args()
+
+    for genre in [g.strip() for g in args.genres.split(",") if g.strip()]:
+        out_dir = os.path.join(args.out_root, genre) if args.out_root else None
+        export_torchscript(BASE_DIRS[genre], out_dir)
@@ -1,6 +1,12 @@
 import json
 import numpy as np
-import os
+import os, sys
+
+PROJ_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from LSTM.model.vocab import VOCAB_FILE, LEGACY_FILES, save_vocab
 
 def load_and_prepare_dataset(json_path, window_size=3):
     with open(json_path, "r", encoding="utf-8") as f:
@@ -31,8 +37,8 @@ def load_and_prepare_dataset(json_path, window_size=3):
 
 def save_dataset_for_genre(json_path, save_dir, window_size=3):
     os.makedirs(save_dir, exist_ok=True)
-    # npy 파일 삭제 (있으면)
-    for fn in ["X.npy", "y.npy", "chord_to_index.npy", "index_to_chord.npy"]:
+    # 이전 산출물 삭제 (있으면, 레거시 pickled vocab 포함)
+    for fn in ["X.npy", "y.npy", VOCAB_FILE, *LEGACY_FILES]:
         file_path = os.path.join(save_dir, fn)
         if os.path.exists(file_path):
             os.remove(file_path)
@@ -40,8 +46,7 @@ def save_dataset_for_genre(json_path, save_dir, window_size=3):
     X, y, chord_to_index, index_to_chord = load_and_prepare_dataset(json_path, window_size=window_size)
     np.save(os.path.join(save_dir, "X.npy"), X)
     np.save(os.path.join(save_dir, "y.npy"), y)
-    np.save(os.path.join(save_dir, "chord_to_index.npy"), chord_to_index, allow_pickle=True)
-    np.save(os.path.join(save_dir, "index_to_chord.npy"), index_to_chord, allow_pickle=True)
+    save_vocab(os.path.join(save_dir, VOCAB_FILE), index_to_chord)
     print(f"[{os.path.basename(save_dir)}] ✅ 저장 완료 | X: {X.shape}, y: {y.shape}, vocab: {len(chord_to_index)}")
 
 if __name__ == "__main__":
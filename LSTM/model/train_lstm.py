@@ -3,6 +3,7 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import os
+from typing import Optional, Tuple
 
 # LSTM 모델 정의
 class ChordLSTM(nn.Module):
@@ -18,13 +19,29 @@ class ChordLSTM(nn.Module):
         out = self.fc(h_n[-1])
         return out
 
+    @torch.jit.export
+    def step(
+        self, x: torch.Tensor, state: Optional[Tuple[torch.Tensor, torch.Tensor]] = None
+    ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, torch.Tensor]]:
+        """
+        토큰 1개씩 진행하는 스트리밍 스텝.
+        x: [B] 토큰 인덱스, state: 이전 (h, c) 또는 None(영벡터).
+        반환: (logits [B, vocab], (h_n, c_n))
+        """
+        emb = self.embedding(x).unsqueeze(1)
+        _, (h_n, c_n) = self.lstm(emb, state)
+        return self.fc(h_n[-1]), (h_n, c_n)
+
 if __name__ == '__main__':
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from LSTM.model.vocab import load_vocab_dir
+
     # 경로
     model_dir = "../../app/assets/model/pop"
     X = np.load(os.path.join(model_dir, "X.npy"))
     y = np.load(os.path.join(model_dir, "y.npy"))
-    chord_to_index = np.load(os.path.join(model_dir, "chord_to_index.npy"), allow_pickle=True).item()
-    index_to_chord = np.load(os.path.join(model_dir, "index_to_chord.npy"), allow_pickle=True).item()
+    chord_to_index, index_to_chord = load_vocab_dir(model_dir)
 
     vocab_size = len(chord_to_index)
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
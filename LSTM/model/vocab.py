@@ -0,0 +1,169 @@
+# LSTM/model/vocab.py
+"""
+코드 사전(vocab) 바이너리 포맷. pickle 없이 mmap 으로 열리고, 워커 프로세스 간 페이지 캐시를 공유한다.
+기존 chord_to_index.npy / index_to_chord.npy(두 벌의 pickled dict)를 파일 하나로 대체.
+
+레이아웃(little endian)
+  magic(8s) n(I)
+  offsets : (n+1) × I   토큰 i 의 utf-8 바이트 범위 = blob[offsets[i]:offsets[i+1]]
+  order   : n × I       토큰 바이트 기준 정렬 순서(이진 탐색용)
+  blob    : utf-8 토큰 문자열들(인덱스 순)
+
+사용(레거시 변환): python LSTM/model/vocab.py --convert app/assets/model/rock
+"""
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, Optional
+
+VOCAB_FILE = "vocab.bin"
+LEGACY_FILES = ("chord_to_index.npy", "index_to_chord.npy")
+MAGIC = b"CBBVOC01"
+HEADER = struct.Struct("<8sI")
+
+
+def save_vocab(path: str, index_to_chord: Dict[int, str]) -> str:
+    n = len(index_to_chord)
+    tokens = [index_to_chord[i].encode("utf-8") for i in range(n)]
+    offsets = [0]
+    for t in tokens:
+        offsets.append(offsets[-1] + len(t))
+    order = sorted(range(n), key=lambda i: tokens[i])
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n))
+        f.write(struct.pack(f"<{n + 1}I", *offsets))
+        f.write(struct.pack(f"<{n}I", *order))
+        f.write(b"".join(tokens))
+    os.replace(tmp_path, path)
+    return path
+
+
+class ChordVocab:
+    """mmap 된 vocab.bin. 토큰↔인덱스 조회는 파일 위에서 직접 수행(dict 를 만들지 않음)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"invalid vocab file: {path}")
+        self._offsets_at = HEADER.size
+        self._order_at = self._offsets_at + 4 * (self.n + 1)
+        self._blob_at = self._order_at + 4 * self.n
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _bytes_of(self, i: int) -> bytes:
+        start, end = struct.unpack_from("<II", self._mm, self._offsets_at + 4 * i)
+        return self._mm[self._blob_at + start:self._blob_at + end]
+
+    def token(self, i: int) -> str:
+        if not 0 <= i < self.n:
+            raise KeyError(i)
+        return self._bytes_of(i).decode("utf-8")
+
+    def index(self, chord: str) -> Optional[int]:
+        key = chord.encode("utf-8")
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = struct.unpack_from("<I", self._mm, self._order_at + 4 * mid)[0]
+            cur = self._bytes_of(i)
+            if cur == key:
+                return i
+            if cur < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def tokens(self) -> Iterator[str]:
+        for i in range(self.n):
+            yield self.token(i)
+
+
+class ChordToIndex:
+    """chord_to_index dict 호환 뷰(get / [] / in / len)."""
+
+    def __init__(self, vocab: ChordVocab):
+        self.vocab = vocab
+        self._memo: Dict[str, int] = {}  # 찾은 토큰만 캐시(vocab 크기를 넘지 않음), 미스는 매번 이분 탐색
+
+    def get(self, chord, default=None):
+        if not isinstance(chord, str):
+            return default
+        i = self._memo.get(chord)
+        if i is None:
+            i = self.vocab.index(chord)
+            if i is None:
+                return default
+            self._memo[chord] = i
+        return i
+
+    def __getitem__(self, chord):
+        i = self.get(chord)
+        if i is None:
+            raise KeyError(chord)
+        return i
+
+    def __contains__(self, chord) -> bool:
+        return self.get(chord) is not None
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+
+class IndexToChord:
+    """index_to_chord dict 호환 뷰(get / [] / in / len)."""
+
+    def __init__(self, vocab: ChordVocab):
+        self.vocab = vocab
+
+    def get(self, i, default=None):
+        try:
+            return self.vocab.token(int(i))
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def __getitem__(self, i):
+        return self.vocab.token(int(i))
+
+    def __contains__(self, i) -> bool:
+        return self.get(i) is not None
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+
+def load_vocab_dir(base: str):
+    """base 폴더의 vocab 로드 → (chord_to_index, index_to_chord). vocab.bin 우선, 없으면 레거시 .npy."""
+    path = os.path.join(base, VOCAB_FILE)
+    if os.path.exists(path):
+        vocab = ChordVocab(path)
+        return ChordToIndex(vocab), IndexToChord(vocab)
+
+    import numpy as np  # 레거시 포맷만 numpy/pickle 필요
+    c2i = np.load(os.path.join(base, LEGACY_FILES[0]), allow_pickle=True).item()
+    i2c = np.load(os.path.join(base, LEGACY_FILES[1]), allow_pickle=True).item()
+    return c2i, i2c
+
+
+def convert_legacy(base: str) -> str:
+    """레거시 index_to_chord.npy → vocab.bin."""
+    import numpy as np
+    i2c = np.load(os.path.join(base, LEGACY_FILES[1]), allow_pickle=True).item()
+    return save_vocab(os.path.join(base, VOCAB_FILE), {int(k): str(v) for k, v in i2c.items()})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Convert legacy pickled vocab to vocab.bin")
+    ap.add_argument("--convert", type=str, nargs="+", required=True, help="모델 폴더(여러 개 가능)")
+    args = ap.parse_args()
+    for d in args.convert:
+        print(f"✅ {convert_legacy(d)}")
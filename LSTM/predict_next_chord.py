@@ -21,7 +21,8 @@ except Exception:
     pass
 
 from LSTM.model.train_lstm import ChordLSTM
-from LSTM.harmony_score import evaluate_progression
+from LSTM.model.vocab import load_vocab_dir
+from LSTM.harmony_score import evaluate_progressions_batch
 from LSTM.chord_engine.smart_progression import generate_topk
 
 BASE_DIRS = {
@@ -47,22 +48,72 @@ def parse_seed_line(line: str) -> List[str]:
         return [x.strip() for x in line.split(",")]
     return line.strip().split()
 
-def load_model_and_vocab(genre: str):
+# 추론 백엔드: auto(내보낸 TorchScript 우선 → eager) | torchscript | eager
+LSTM_BACKEND = os.environ.get("CBB_LSTM_BACKEND", "auto").lower()
+TORCHSCRIPT_FILE = "chord_lstm.ts.pt"
+# 1이면 eager 모델을 동적 int8 양자화(LSTM/Linear)해서 사용 (CPU 전용 배포용)
+LSTM_QUANTIZE = os.environ.get("CBB_LSTM_QUANTIZE", "0") == "1"
+
+def load_vocab(base: str):
+    """vocab.bin(mmap, pickle 없음) 우선, 없으면 레거시 chord_to_index/index_to_chord.npy."""
+    return load_vocab_dir(base)
+
+def load_eager_model(base: str, vocab_size: int):
+    model = ChordLSTM(vocab_size)
+    state = torch.load(os.path.join(base, "chord_lstm.pt"), map_location=torch.device("cpu"))
+    if hasattr(model, "embedding"):
+        if "emb.weight" in state and "embedding.weight" not in state:
+            state["embedding.weight"] = state.pop("emb.weight")
+    elif hasattr(model, "emb"):
+        if "embedding.weight" in state and "emb.weight" not in state:
+            state["emb.weight"] = state.pop("embedding.weight")
+    model.load_state_dict(state, strict=False)
+    model.eval()
+    return model
+
+def quantize_model(model):
+    """동적 int8 양자화(LSTM/Linear 가중치 int8, 활성값은 실행 시 양자화). Embedding 은 fp32 유지."""
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8
+    )
+
+def load_torchscript_model(base: str):
+    """export_lstm.py 로 내보낸 TorchScript 모듈(forward + step). 없으면 None."""
+    path = os.path.join(base, TORCHSCRIPT_FILE)
+    if not os.path.exists(path):
+        return None
+    model = torch.jit.load(path, map_location=torch.device("cpu"))
+    model.eval()
+    return model
+
+def load_model_and_vocab(genre: str, backend: Optional[str] = None, quantize: Optional[bool] = None):
     try:
         base = BASE_DIRS[genre]
-        c2i = np.load(os.path.join(base, "chord_to_index.npy"), allow_pickle=True).item()
-        i2c = np.load(os.path.join(base, "index_to_chord.npy"), allow_pickle=True).item()
-        model = ChordLSTM(len(c2i))
-        state = torch.load(os.path.join(base, "chord_lstm.pt"), map_location=torch.device("cpu"))
-        if hasattr(model, "embedding"):
-            if "emb.weight" in state and "embedding.weight" not in state:
-                state["embedding.weight"] = state.pop("emb.weight")
-        elif hasattr(model, "emb"):
-            if "embedding.weight" in state and "emb.weight" not in state:
-                state["emb.weight"] = state.pop("embedding.weight")
-        model.load_state_dict(state, strict=False)
-        model.eval()
-        print(f"🧠 Using LSTM model: {os.path.join(base, 'chord_lstm.pt')}")
+        c2i, i2c = load_vocab(base)
+        backend = (backend or LSTM_BACKEND).lower()
+        quantize = LSTM_QUANTIZE if quantize is None else quantize
+
+        model = None
+        if quantize:
+            # 양자화는 eager 모듈 기준(내보낸 TorchScript 는 fp32 로 freeze 되어 있음)
+            eager = load_eager_model(base, len(c2i))
+            try:
+                model = quantize_model(eager)
+                print(f"🧠 Using LSTM model (int8 dynamic): {os.path.join(base, 'chord_lstm.pt')}")
+            except Exception as e:
+                print(f"⚠️  int8 양자화 실패(fp32 eager로 대체): {e}")
+                model = eager
+                print(f"🧠 Using LSTM model: {os.path.join(base, 'chord_lstm.pt')}")
+        elif backend in ("auto", "torchscript"):
+            try:
+                model = load_torchscript_model(base)
+            except Exception as e:
+                print(f"⚠️  TorchScript 로딩 실패(eager로 대체): {e}")
+            if model is not None:
+                print(f"🧠 Using LSTM model (torchscript): {os.path.join(base, TORCHSCRIPT_FILE)}")
+        if model is None:
+            model = load_eager_model(base, len(c2i))
+            print(f"🧠 Using LSTM model: {os.path.join(base, 'chord_lstm.pt')}")
         return model, c2i, i2c
     except Exception as e:
         print(f"⚠️  모델 로딩 실패(룰만 사용): {e}")
@@ -79,6 +130,22 @@ def seq_similarity(a: List[str], b: List[str]) -> float:
     same = sum(1 for i in range(n) if a[i]==b[i])
     return same / n
 
+def _encode_tokens(seqs: List[List[str]], vocab: dict, pad: int) -> Tuple[np.ndarray, np.ndarray]:
+    """시퀀스들 → (정수 토큰 행렬 [N, L], 길이 [N]). 빈 칸은 pad."""
+    lens = np.array([len(s) for s in seqs], dtype=np.int64)
+    width = int(lens.max()) if len(seqs) else 0
+    mat = np.full((len(seqs), width), pad, dtype=np.int64)
+    for i, seq in enumerate(seqs):
+        mat[i, :len(seq)] = [vocab.setdefault(t, len(vocab)) for t in seq]
+    return mat, lens
+
+def _same_and_overlap(mat: np.ndarray, lens: np.ndarray, ref: np.ndarray, ref_len: int):
+    """후보 전체 vs 기준 시퀀스 1개: (같은 포지션 수, 비교 길이 n=min(len)) 벡터."""
+    width = min(mat.shape[1], ref.shape[0])
+    same = (mat[:, :width] == ref[None, :width]).sum(axis=1)
+    n = np.minimum(lens, ref_len)
+    return same, n
+
 def mmr_select(
     cands: List[Tuple[List[str], float]],
     k: int = 2,
@@ -89,46 +156,64 @@ def mmr_select(
     """
     cands: (seq, score). lam↑ = 관련성 우선, lam↓ = 다양성 우선.
     min_diff: 기존 선택/고정 시퀀스들과 최소 몇 포지션 달라야 하는지.
+
+    NumPy 구현: 후보를 정수 토큰 행렬로 만들고, 기준(already + 선택됨)과의
+    최소 차이 포지션 수 / 최대 유사도를 벡터로 유지하며 선택할 때마다 증분 갱신한다.
+    (선택 결과는 pairwise 루프 구현과 동일)
     """
     # 점수 내림차순 정렬
     pool = sorted(cands, key=lambda x: x[1], reverse=True)
+    base = already or []
+    if not pool:
+        return []
+
+    vocab: dict = {}
+    mat, lens = _encode_tokens([seq for seq, _ in pool], vocab, pad=-1)
+    scores = np.array([float(sc) for _, sc in pool], dtype=np.float64)
+
+    # 같은 시퀀스(튜플 동일)는 한 번만 선택 가능
+    group_ids: dict = {}
+    groups = np.array([group_ids.setdefault(tuple(seq), len(group_ids)) for seq, _ in pool], dtype=np.int64)
+    used = np.zeros(len(pool), dtype=bool)
+
+    min_d = np.full(len(pool), np.iinfo(np.int64).max, dtype=np.int64)  # 기준들과의 최소 차이 포지션 수
+    max_sim = np.zeros(len(pool), dtype=np.float64)                     # 기준들과의 최대 유사도
+
+    def add_reference(seq: List[str]) -> None:
+        nonlocal min_d, max_sim
+        ref = np.array([vocab.get(t, -2) for t in seq], dtype=np.int64)  # 후보에 없는 토큰은 -2(불일치)
+        same, n = _same_and_overlap(mat, lens, ref, len(seq))
+        min_d = np.minimum(min_d, n - same)
+        sim = np.where(n > 0, same / np.maximum(n, 1), 0.0)
+        max_sim = np.maximum(max_sim, sim)
+
+    for b in base:
+        add_reference(b)
 
     selected: List[Tuple[List[str], float]] = []
-    used = set()
-    base = already or []
+
+    def take(i: int) -> None:
+        seq, sc = pool[i]
+        selected.append((seq, sc))
+        used[groups == groups[i]] = True
+        add_reference(seq)
 
     # 1개 먼저 뽑기: 가장 높은 점수 + min_diff 조건 만족하는 첫 후보
-    for seq, sc in pool:
-        if any(_diff_positions(seq, b) < min_diff for b in base):
-            continue
-        t = tuple(seq)
-        if t in used: continue
-        selected.append((seq, sc)); used.add(t)
-        break
+    first = np.flatnonzero(min_d >= min_diff)
+    if first.size:
+        take(int(first[0]))
 
     # 2~k개: MMR로 선택(유사도 높은 건 패널티)
     relax = 0
     while len(selected) < k:
-        best = None
-        for seq, sc in pool:
-            t = tuple(seq)
-            if t in used: continue
-            # 최소 차이 포지션 보장 (선택/베이스 모두와)
-            if any(_diff_positions(seq, s) < (min_diff - relax) for s,_ in selected) or \
-               any(_diff_positions(seq, b) < (min_diff - relax) for b in base):
-                continue
-            max_sim = 0.0
-            for s,_ in selected + [(x,0.0) for x in base]:
-                max_sim = max(max_sim, seq_similarity(seq, s))
-            mmr = lam*sc - (1.0-lam)*max_sim
-            if (best is None) or (mmr > best[2]):
-                best = (seq, sc, mmr)
-        if best is None:
+        eligible = ~used & (min_d >= (min_diff - relax))
+        if not eligible.any():
             # 후보가 더 없으면 조건을 한 단계 완화
             relax += 1
             if relax > min_diff: break
             continue
-        selected.append((best[0], best[1])); used.add(tuple(best[0]))
+        mmr = lam * scores - (1.0 - lam) * max_sim
+        take(int(np.argmax(np.where(eligible, mmr, -np.inf))))
 
     return selected
 
@@ -235,11 +320,11 @@ def main():
     # 2) 모델+룰 블렌딩 후보를 더 많이 뽑아(다양성 확보) MMR로 2개 선택
     blended: List[Tuple[List[str], float]] = []
     if use_model:
-        def scorer_fn(seq: List[str]) -> float:
-            return float(evaluate_progression(model, seq, c2i, i2c))
+        def batch_scorer_fn(seqs: List[List[str]]) -> List[float]:
+            return evaluate_progressions_batch(model, seqs, c2i, i2c)
 
-        # 후보풀 확장 (20 -> 64)
-        blended_pool = generate_topk(genre=genre, seed_roots=seed_roots, k=64, scorer=scorer_fn, alpha=0.5)
+        # 후보풀 확장 (20 -> 64), 후보 전체를 forward 1회로 채점
+        blended_pool = generate_topk(genre=genre, seed_roots=seed_roots, k=64, batch_scorer=batch_scorer_fn, alpha=0.5)
         blended_pool = [(s, sc) for (s, sc) in blended_pool if tuple(s) != tuple(top1_seq)]
         # MMR로 2개 (다양성 우선, 최소 3포지션 이상 다르게)
         blended = mmr_select(blended_pool, k=2, lam=0.55, already=[top1_seq], min_diff=3)
@@ -0,0 +1,363 @@
+# SongMaker/ai_song_maker/direct_midi.py
+"""
+parts_data → MIDI 직접 변환(music21 Score 를 만들지 않음).
+
+웹 흐름은 재생/HUD 용 MIDI 만 즉시 필요하므로, process_and_output_score 와 같은 해석 규칙
+(beat_ends 누적, 같은 beat_end 는 두 번째 보이스 파트로 분리, dynamics → velocity, 마디 경계를 넘는
+음의 타이 결합)으로 mido 이벤트를 바로 만든다. MusicXML 은 parts_data 를 JSON(<이름>.parts.json)으로
+남겨두고 필요할 때 build_musicxml 로 생성한다.
+"""
+import json
+import os
+from fractions import Fraction
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from mido import Message, MetaMessage, MidiFile, MidiTrack, bpm2tempo
+from music21 import common, dynamics, instrument, key, meter, pitch, tempo
+
+from .score_helper import (
+    dynamic_to_midi_velocity,
+    get_section_data,
+    get_time_signature,
+    is_valid_note,
+    process_and_output_score,
+)
+
+TICKS_PER_BEAT = 10080          # music21 MIDI 출력과 동일
+PARTS_SUFFIX = ".parts.json"
+PERCUSSION_CHANNEL = 9
+_REST_WORDS = ("", "rest", "Rest", "rests", "z", "r", "R")
+_UNSET_VELOCITY_BASE = 0.70866  # music21 Volume.getRealized: velocity 미지정 음의 기본값
+
+
+@lru_cache(maxsize=512)
+def _midi_of(name: str) -> Optional[int]:
+    try:
+        return pitch.Pitch(name).midi
+    except (pitch.AccidentalException, pitch.PitchException, ValueError):
+        return None
+
+
+def _chord_midis(names) -> Optional[List[int]]:
+    midis = [_midi_of(str(n)) for n in names]
+    if not midis or any(m is None for m in midis):
+        return None
+    return midis
+
+
+@lru_cache(maxsize=64)
+def _dynamic_scalar(mark: str) -> float:
+    try:
+        scalar = dynamics.Dynamic(mark).volumeScalar
+    except Exception:
+        scalar = None
+    return 0.55 if scalar is None else float(scalar)
+
+
+def _realized_velocity(velocity: Optional[int], bar_dynamic: str) -> int:
+    """music21 의 상대 velocity × 마디 dynamic 스케일(0~1 클립) → 0~127."""
+    val = _UNSET_VELOCITY_BASE if velocity is None else 0.5 * (velocity / 127.0 * 2.0)
+    val = min(1.0, max(0.0, val * _dynamic_scalar(bar_dynamic) * 2.0))
+    return int(round(val * 127))
+
+
+def _element_midis(n) -> Optional[List[int]]:
+    """process_and_output_score 의 음/화음/쉼표 판정과 동일. 쉼표면 None."""
+    if hasattr(n, "pitches"):                     # music21 GeneralNote
+        return [p.midi for p in n.pitches] or None
+    if isinstance(n, list) and len(n) > 0:
+        if n == ["rest"]:
+            return None
+        notes = [str(c).replace("S", "#") for c in n]
+        if not all(is_valid_note(c) for c in notes):
+            first = notes[0]
+            m = _midi_of(first[0]) if len(first) > 0 else None
+            return [m] if m is not None else None
+        return _chord_midis(notes)
+    if isinstance(n, str) and n not in _REST_WORDS:
+        n = n.replace("S", "#")
+        if not is_valid_note(n) or " " in n:
+            midis = _chord_midis(n.split())
+            if midis is None:
+                m = _midi_of(n[0])
+                return [m] if m is not None else None
+            return midis
+        m = _midi_of(n)
+        return [m] if m is not None else None
+    return None
+
+
+def _split_voices(part_data) -> Tuple[tuple, tuple]:
+    """같은 beat_end(또는 0)를 가진 음을 두 번째 보이스로 분리. (메인, 두 번째) 각각 (notes, beat_ends, dynamics)."""
+    notes = get_section_data(part_data, "melodies", get_section_data(part_data, "chords", []))
+    beats = list(get_section_data(part_data, "beat_ends", []))
+    dyns = get_section_data(part_data, "dynamics", [])
+    m1, b1, d1, m2, b2, d2 = [], [], [], [], [], []
+    for i in range(len(notes)):
+        if i >= len(beats):
+            beats.append(beats[i - 1] + 1)
+        dynamic = dyns[i] if i < len(dyns) else "mf"
+        if (i > 0 and beats[i] == beats[i - 1]) or beats[i] == 0:
+            m2.append(notes[i])
+            b2.append(beats[i + 1] if i < len(beats) - 1 else beats[i])
+            if dynamic:
+                d2.append(dynamic)
+        else:
+            m1.append(notes[i])
+            b1.append(beats[i])
+            if dynamic:
+                d1.append(dynamic)
+    return (m1, b1, d1), (m2, b2, d2)
+
+
+def _advance_bar(acc: float, r: float, bar_len: float) -> Tuple[float, bool]:
+    """
+    process_and_output_score 의 마디 누적 길이 갱신을 그대로 따라감 → (새 누적 길이, 새 마디 시작 여부).
+    두 마디 이상 걸치는 음은 단순 나머지와 결과가 다르다(분할 루프에서 누적값이 갱신되지 않음).
+    """
+    if acc + r <= bar_len:
+        acc += r
+        return (0, True) if acc == bar_len else (acc, False)
+    remaining = bar_len - acc
+    nxt = r - remaining
+    long_rest = r - (remaining + bar_len)
+    if long_rest > 0:
+        nxt = bar_len
+    acc = nxt % bar_len
+    r -= remaining + nxt
+    while long_rest > 0:
+        if acc + r > bar_len:
+            remaining = bar_len - acc
+            nxt = r - remaining
+            long_rest = r - (remaining + bar_len)
+            if long_rest > 0:
+                nxt = bar_len
+            r -= remaining + max(nxt, 0)
+        else:
+            acc += r
+            long_rest = 0
+            if acc == bar_len:
+                acc = 0
+    return acc, True
+
+
+def _part_events(notes, beats, dyns, bar_len) -> List[Tuple[Fraction, Fraction, List[int], int]]:
+    """(시작 시간, 길이(4분음표 단위), [note...], velocity) 목록."""
+    events = []
+    t = Fraction(0)
+    current_beat = 0
+    acc = 0                           # 현재 마디 안의 누적 길이(score_helper 와 같은 float 누적)
+    dyn = "mf"                        # 현재 dynamic
+    bar_dyn = "mf"                    # 현재 마디 시작에 찍힌 dynamic
+    for i, (n, beat_no) in enumerate(zip(notes, beats)):
+        if not isinstance(beat_no, (float, int, Fraction)):
+            continue
+        if beat_no > current_beat:
+            r = beat_no - current_beat
+        elif beat_no == current_beat:
+            continue
+        else:
+            r = beat_no
+        current_beat = beat_no
+        # music21 Duration 과 동일한 양자화(opFrac), 0 으로 반올림되면 기본 1박
+        dur = Fraction(common.opFrac(r)) or Fraction(1)
+
+        if i < len(dyns):
+            dyn = dyns[i] or "mf"
+        midis = _element_midis(n)
+
+        crosses = acc + r > bar_len
+        if midis:
+            velocity = None if crosses else dynamic_to_midi_velocity(dyn)
+            if hasattr(n, "volume") and not crosses:
+                velocity = n.volume.velocity
+            events.append((t, dur, midis, _realized_velocity(velocity, bar_dyn)))
+
+        # 마디 경계를 지나면 새 마디는 그 시점의 dynamic 으로 시작
+        acc, new_bar = _advance_bar(acc, r, bar_len)
+        if new_bar:
+            bar_dyn = dyn
+        t += dur
+    return events
+
+
+def _key_name(key_data) -> str:
+    try:
+        k = key_data if isinstance(key_data, key.Key) else key.Key(key_data if isinstance(key_data, str) else "C")
+    except Exception:
+        k = key.Key("C")
+    name = k.tonic.name.replace("-", "b")
+    return name + ("m" if k.mode == "minor" else "")
+
+
+def _tempo_bpm(tempo_data) -> float:
+    if isinstance(tempo_data, (int, float)):
+        return float(tempo_data)
+    number = getattr(tempo_data, "number", None)
+    return float(number) if number else 120.0
+
+
+def _resolve_instrument(inst):
+    if isinstance(inst, instrument.Instrument):
+        return inst
+    if isinstance(inst, str):
+        from .score_helper import get_instrument_class_by_name
+        return get_instrument_class_by_name(inst) or instrument.Piano()
+    return instrument.Piano()
+
+
+def build_parts_midi(parts_data, score_data, ticks_per_beat: int = TICKS_PER_BEAT) -> MidiFile:
+    """parts_data/score_data 를 그대로 해석해 메모리 MidiFile 생성(입력은 변경하지 않음)."""
+    ts = get_time_signature(score_data.get("time_signature"))
+    bar_len = float(ts.barDuration.quarterLength)
+
+    mid = MidiFile(type=1, ticks_per_beat=ticks_per_beat)
+    conductor = MidiTrack()
+    conductor.append(MetaMessage("set_tempo", tempo=bpm2tempo(_tempo_bpm(score_data.get("tempo"))), time=0))
+    conductor.append(MetaMessage("key_signature", key=_key_name(score_data.get("key")), time=0))
+    conductor.append(MetaMessage("time_signature", numerator=ts.numerator, denominator=ts.denominator, time=0))
+    mid.tracks.append(conductor)
+
+    # 메인 파트들 → 분리된 두 번째 보이스 파트들 순서(process_and_output_score 의 큐 순서)
+    voices = []
+    pending = list(parts_data.items())
+    while pending:
+        part_id, part_data = pending.pop(0)
+        main, second = _split_voices(part_data)
+        if second[0]:
+            pending.append((part_id + "Y", {"instrument": part_data.get("instrument"),
+                                            "melodies": second[0], "beat_ends": second[1],
+                                            "dynamics": second[2]}))
+        if main[0] and main[1]:
+            voices.append((part_data.get("instrument"), main))
+
+    channels = {}                     # music21 처럼 같은 program 은 같은 채널 공유
+    next_channel = 0
+    for inst_data, (notes, beats, dyns) in voices:
+        inst = _resolve_instrument(inst_data)
+        if inst.midiChannel == PERCUSSION_CHANNEL:
+            channel, program = PERCUSSION_CHANNEL, 0
+        else:
+            program = inst.midiProgram or 0
+            channel = channels.get(program)
+            if channel is None:
+                if next_channel == PERCUSSION_CHANNEL:
+                    next_channel += 1
+                channel = channels[program] = next_channel % 16
+                next_channel += 1
+
+        track = MidiTrack()
+        track.append(MetaMessage("track_name", name=inst.partName or inst.instrumentName or "", time=0))
+        track.append(Message("program_change", channel=channel, program=program, time=0))
+
+        # 끝 틱 = 시작 틱 + 길이 틱(music21 과 같은 반올림), 같은 시각이면 note_off 먼저
+        events = []
+        for t, dur, midis, vel in _part_events(notes, beats, dyns, bar_len):
+            on_tick = int(round(t * ticks_per_beat))
+            off_tick = on_tick + int(round(dur * ticks_per_beat))
+            events.extend((on_tick, 1, m, vel) for m in midis)
+            events.extend((off_tick, 0, m, 0) for m in midis)
+        events.sort(key=lambda e: (e[0], e[1]))
+        cur = 0
+        for tick, on, note_num, vel in events:
+            kind = "note_on" if on else "note_off"
+            track.append(Message(kind, channel=channel, note=note_num, velocity=vel, time=tick - cur))
+            cur = tick
+        track.append(MetaMessage("end_of_track", time=0))
+        mid.tracks.append(track)
+
+    return mid
+
+
+def write_parts_midi(parts_data, score_data, midi_path: str, ticks_per_beat: int = TICKS_PER_BEAT) -> str:
+    """build_parts_midi 결과를 MIDI 파일로 저장."""
+    build_parts_midi(parts_data, score_data, ticks_per_beat).save(midi_path)
+    return midi_path
+
+
+def parts_path_for(musicxml_path: str) -> str:
+    return os.path.splitext(musicxml_path)[0] + PARTS_SUFFIX
+
+
+# parts_data/score_data 의 music21 객체 → JSON 태그 객체(읽을 때 같은 객체로 복원)
+_INSTRUMENT_ATTRS = ("partName", "instrumentName", "midiProgram", "midiChannel")
+
+
+def _encode_parts(obj):
+    if isinstance(obj, instrument.Instrument):
+        data = {a: getattr(obj, a, None) for a in _INSTRUMENT_ATTRS}
+        return {"__instrument__": type(obj).__name__, **data}
+    if isinstance(obj, Fraction):
+        return {"__fraction__": str(obj)}
+    if isinstance(obj, key.Key):
+        return obj.tonicPitchNameWithCase          # "C" / "a" → key.Key 로 그대로 복원
+    if isinstance(obj, meter.TimeSignature):
+        return obj.ratioString
+    if isinstance(obj, tempo.MetronomeMark):
+        return obj.number
+    raise TypeError(f"parts_data 에 JSON 으로 저장할 수 없는 값: {type(obj).__name__}")
+
+
+def _decode_parts(obj: dict):
+    if "__instrument__" in obj:
+        cls = getattr(instrument, obj["__instrument__"], None)
+        if not (isinstance(cls, type) and issubclass(cls, instrument.Instrument)):
+            cls = instrument.Instrument
+        inst = cls()
+        for a in _INSTRUMENT_ATTRS:
+            setattr(inst, a, obj.get(a))
+        return inst
+    if "__fraction__" in obj:
+        return Fraction(obj["__fraction__"])
+    return obj
+
+
+def save_parts(parts_data, score_data, parts_path: str) -> str:
+    tmp = f"{parts_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"parts_data": parts_data, "score_data": score_data}, f,
+                  ensure_ascii=False, default=_encode_parts)
+    os.replace(tmp, parts_path)
+    return parts_path
+
+
+def load_parts(parts_path: str) -> Tuple[dict, dict]:
+    with open(parts_path, "r", encoding="utf-8") as f:
+        saved = json.load(f, object_hook=_decode_parts)
+    return saved["parts_data"], saved["score_data"]
+
+
+def output_parts(parts_data, score_data, musicxml_path: str, midi_path: str, musicxml: bool = True,
+                 save_midi: bool = True) -> dict:
+    """
+    생성기 공통 출력.
+    musicxml=True  : 기존처럼 music21 로 MusicXML + MIDI 작성
+    musicxml=False : MIDI 만 직접 작성하고 parts_data 를 JSON 으로 저장(→ build_musicxml 로 나중에 생성)
+    save_midi=False: MIDI 는 쓰지 않고 메모리 MidiFile 을 "midi" 로 돌려줌(후처리 쪽이 midi_path 에 한 번만 저장)
+    """
+    # process_and_output_score 가 parts_data 를 바꾸므로 메모리 MIDI 는 먼저 만든다
+    mid = None if save_midi else build_parts_midi(parts_data, score_data)
+    if musicxml:
+        process_and_output_score(parts_data, score_data, musicxml_path=musicxml_path,
+                                 midi_path=midi_path if save_midi else None, show_html=False)
+        out = {"midi_path": midi_path, "musicxml_path": musicxml_path}
+    else:
+        parts_path = save_parts(parts_data, score_data, parts_path_for(musicxml_path))
+        if save_midi:
+            write_parts_midi(parts_data, score_data, midi_path)
+        out = {"midi_path": midi_path, "musicxml_path": musicxml_path, "parts_path": parts_path}
+
+    if mid is not None:
+        out["midi"] = mid
+    return out
+
+
+def build_musicxml(parts_path: str, musicxml_path: str) -> str:
+    """output_parts(musicxml=False) 가 남긴 parts_data 로 MusicXML 만 생성."""
+    parts_data, score_data = load_parts(parts_path)
+    process_and_output_score(
+        parts_data, score_data,
+        musicxml_path=musicxml_path, midi_path=None, show_html=False, archive=False,
+    )
+    return musicxml_path
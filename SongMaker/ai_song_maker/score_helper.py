@@ -33,12 +33,15 @@ def move_music_files_to_archive(directory, archive_directory='/mnt/data/midi_mus
 
 
 def process_and_output_score(parts_data, score_data, musicxml_path='/mnt/data/song_musicxml.xml',
-                             midi_path='/mnt/data/song_midi.mid', show_html=True, sheet_music_html_path='/mnt/data/sheet_music.html'):
-    try:
-        directory = os.path.dirname(musicxml_path)
-        move_music_files_to_archive(directory)
-    except Exception as e:
-        print("failed to archive old files")
+                             midi_path='/mnt/data/song_midi.mid', show_html=True, sheet_music_html_path='/mnt/data/sheet_music.html',
+                             archive=True):
+    # musicxml_path / midi_path 가 None 이면 해당 파일은 쓰지 않음, archive=False 면 기존 파일 보관 이동 생략
+    if archive:
+        try:
+            directory = os.path.dirname(musicxml_path or midi_path)
+            move_music_files_to_archive(directory)
+        except Exception as e:
+            print("failed to archive old files")
 
     score = stream.Score()
     queue = deque(parts_data.keys())
@@ -313,12 +316,14 @@ def process_and_output_score(parts_data, score_data, musicxml_path='/mnt/data/so
             part.append(bar)  # Append the last bar
 
     # Write the score to MusicXML and MIDI files
-    score.write('musicxml', fp=musicxml_path)
-    score.write('midi', fp=midi_path)
+    if musicxml_path:
+        score.write('musicxml', fp=musicxml_path)
+    if midi_path:
+        score.write('midi', fp=midi_path)
 
     print("Fix warning or error messages printed above next time. If Any.")
     print("Ask user for feedback or to continue on with the next section (if applicable).")
-    print("Midi/MusicXML saved to mount - sandbox:" + midi_path + " and sandbox:" + musicxml_path + " - provide user links to download it.")
+    print("Midi/MusicXML saved to mount - sandbox:" + str(midi_path) + " and sandbox:" + str(musicxml_path) + " - provide user links to download it.")
     #
     try:
         if show_html:
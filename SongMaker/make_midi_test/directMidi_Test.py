@@ -0,0 +1,71 @@
+# make_midi_test/directMidi_Test.py
+"""
+direct_midi(write_parts_midi) 출력이 music21 경로(process_and_output_score)의 MIDI 와 같은지 확인.
+
+장르(rock/jazz/pop) × 고정 시드마다 같은 입력으로 두 경로를 모두 돌려 노트 이벤트
+(틱, on/off, 채널, 음, velocity)·프로그램 체인지·템포를 비교한다. 다르면 첫 차이를 출력하고 종료 코드 1.
+
+    python -m SongMaker.make_midi_test.directMidi_Test
+"""
+import os
+import sys
+import tempfile
+
+from mido import MidiFile
+
+from SongMaker.useSongMaker_rock import generate_rock_track
+from SongMaker.useSongMaker_jazz import generate_jazz_track
+from SongMaker.useSongMaker_pop import generate_pop_track
+
+GENERATORS = {
+    "rock": (generate_rock_track, {"point_inst": "brass_section"}),
+    "jazz": (generate_jazz_track, {"point_inst": "trumpet"}),
+    "pop":  (generate_pop_track, {"point_inst": "flute"}),
+}
+SEEDS = [1, 7, 20241008]
+PROGRESSION = ["C", "Am", "F", "G"] * 2
+
+
+def midi_events(path: str):
+    """(노트 이벤트, 채널별 프로그램, 템포 목록). note_on velocity 0 은 note_off 로 정규화."""
+    mid = MidiFile(path)
+    notes, programs, tempos = [], {}, []
+    for track in mid.tracks:
+        tick = 0
+        for msg in track:
+            tick += msg.time
+            if msg.type == "set_tempo":
+                tempos.append((tick, msg.tempo))
+            elif msg.type == "program_change":
+                programs[msg.channel] = msg.program
+            elif msg.type == "note_on" and msg.velocity > 0:
+                notes.append((tick, 1, msg.channel, msg.note, msg.velocity))
+            elif msg.type in ("note_on", "note_off"):
+                notes.append((tick, 0, msg.channel, msg.note, 0))
+    return sorted(notes), programs, sorted(set(tempos))
+
+
+def compare(genre: str, seed: int, work_dir: str) -> bool:
+    fn, extra = GENERATORS[genre]
+    out = {}
+    for musicxml in (True, False):
+        out_dir = os.path.join(work_dir, f"{genre}-{seed}-{'m21' if musicxml else 'direct'}")
+        out[musicxml] = fn(PROGRESSION, out_dir=out_dir, seed=seed, musicxml=musicxml, **extra)["midi_path"]
+
+    ref, got = midi_events(out[True]), midi_events(out[False])
+    for name, a, b in zip(("notes", "programs", "tempos"), ref, got):
+        if a != b:
+            diff = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b))) \
+                if isinstance(a, list) else None
+            print(f"❌ {genre} seed={seed}: {name} 불일치"
+                  + (f" (#{diff}: music21={a[diff:diff + 1]} direct={b[diff:diff + 1]}, 개수 {len(a)}/{len(b)})"
+                     if diff is not None else f" (music21={a} direct={b})"))
+            return False
+    print(f"✅ {genre} seed={seed}: {len(ref[0])} note events 일치")
+    return True
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as work:
+        results = [compare(g, s, work) for g in GENERATORS for s in SEEDS]
+    sys.exit(0 if all(results) else 1)
@@ -14,7 +14,7 @@ except Exception:
 from music21 import instrument
 
 # 패키지 상대 임포트 (SongMaker가 패키지여야 함: 하위 폴더에 __init__.py 필요)
-from .ai_song_maker.score_helper import process_and_output_score
+from .ai_song_maker.direct_midi import output_parts
 from .Patterns_Jazz.Drum.jazzDrumPatterns import generate_jazz_drum_pattern
 from .Patterns_Jazz.Piano.jazzPianoPatterns import style_bass_backing_minimal
 from .Patterns_Jazz.PointInst.point_inst_list import (
@@ -35,6 +35,8 @@ def generate_jazz_track(
     point_key: str = "C",
     out_dir: Optional[str] = None,
     seed: Optional[int] = None,
+    musicxml: bool = True,        # False: MIDI 만 직접 작성, MusicXML 은 나중에 build_musicxml 로
+    save_midi: bool = True,       # False: MIDI 파일 대신 메모리 MidiFile 을 "midi" 로 반환
 ) -> Dict[str, str]:
     """
     progression/옵션을 받아 Jazz 트랙을 생성하고 MIDI/MusicXML 경로를 반환한다.
@@ -118,6 +120,7 @@ def generate_jazz_track(
     xml_path = os.path.join(out_dir, f"jazz_{tag}.xml")
     midi_path = os.path.join(out_dir, f"jazz_{tag}.mid")
 
-    process_and_output_score(parts_data, score_data, musicxml_path=xml_path, midi_path=midi_path, show_html=False)
+    out = output_parts(parts_data, score_data, musicxml_path=xml_path, midi_path=midi_path,
+                       musicxml=musicxml, save_midi=save_midi)
 
-    return {"midi_path": midi_path, "musicxml_path": xml_path, "tag": tag}
\ No newline at end of file
+    return {**out, "tag": tag}
\ No newline at end of file
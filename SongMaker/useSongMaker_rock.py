@@ -7,7 +7,7 @@ from typing import Optional, List, Dict
 from dotenv import load_dotenv
 load_dotenv()
 
-from .ai_song_maker.score_helper import process_and_output_score
+from .ai_song_maker.direct_midi import output_parts
 from .utils.timing_rock import fix_beats, clip_and_fill_rests
 from .Patterns_Rock.Drum.rockDrumPatterns import generate_rock_drum_pattern
 from .Patterns_Rock.Guitar.rhythmGuitarPatterns import generate_rock_rhythm_guitar
@@ -56,6 +56,8 @@ def generate_rock_track(
     keys_shell: bool = False,     # EP/Keys의 쉘 보이싱 옵션
     out_dir: Optional[str] = None,
     seed: Optional[int] = None,
+    musicxml: bool = True,        # False: MIDI 만 직접 작성, MusicXML 은 나중에 build_musicxml 로
+    save_midi: bool = True,       # False: MIDI 파일 대신 메모리 MidiFile 을 "midi" 로 반환
 ) -> Dict[str, str]:
     """
     ROCK 트랙(드럼/기타/키 + 선택 포인트 라인)을 생성하고 MIDI/MusicXML 경로를 반환한다.
@@ -158,9 +160,10 @@ def generate_rock_track(
     xml_path = os.path.join(out_dir, f"rock_{tag}.xml")
     midi_path = os.path.join(out_dir, f"rock_{tag}.mid")
 
-    process_and_output_score(parts_data, score_data, musicxml_path=xml_path, midi_path=midi_path, show_html=False)
+    out = output_parts(parts_data, score_data, musicxml_path=xml_path, midi_path=midi_path,
+                       musicxml=musicxml, save_midi=save_midi)
 
-    return {"midi_path": midi_path, "musicxml_path": xml_path, "tag": tag}
+    return {**out, "tag": tag}
 
 
 # ─────────────────────────────────────────────────────────
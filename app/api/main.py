@@ -1,4 +1,9 @@
 # app/api/main.py
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,10 +11,49 @@ from .routes_chords import router as chords_router
 from .routes_tracks import router as tracks_router
 from .routes_render import router as render_router
 from .routes_audio  import router as audio_router   # ← 활성화
+from ..core.pipeline_predict import (
+    load_all_models,
+    model_status,
+    predict_cache_stats,
+    warmup_predict_cache,
+)
+from ..core.predict_table import load_prediction_table, prediction_table_status
+from ..core.job_queue import job_queue_stats, shutdown_job_queue
+from ..core.job_store import get_job_store
+from ..core.gen_cache import gen_cache_stats
+from ..core.midi_render import render_status
+from ..core.render_cache import render_cache_stats
+from ..core.render_queue import render_queue_stats, shutdown_render_queue
+from ..core.upload_stream import UploadLimitMiddleware
+from ..core.recordings_catalog import start_reconciler
+from ..core.temp_renders import start_janitor, tmp_render_stats
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 작업 레지스트리 복구: app/jobs/<id>/ 결과물은 있는데 DB에 없는 작업 재등록
+    recovered = get_job_store().recover()
+    print(f"🗂️  job registry recovered: {recovered}")
+    # 사전계산 예측 테이블(mmap). 없거나 모델 해시가 다르면 라이브 경로로 동작
+    load_prediction_table()
+    # 장르별 모델을 병렬 로드 + 더미 forward 워밍업(첫 요청 지연 제거). CBB_EAGER_LOAD=0 이면 지연 로딩
+    if os.environ.get("CBB_EAGER_LOAD", "1") == "1":
+        await asyncio.get_running_loop().run_in_executor(None, load_all_models)
+    # CBB_PREDICT_WARMUP=1 이면 모든 루트 시드 예측을 백그라운드에서 미리 캐시
+    if os.environ.get("CBB_PREDICT_WARMUP", "0") == "1":
+        threading.Thread(target=warmup_predict_cache, name="predict-warmup", daemon=True).start()
+    # 녹음 카탈로그 ↔ recordings/ 동기화(시작 시 + 주기적으로, 백그라운드)
+    start_reconciler()
+    # 업로드 렌더 임시 폴더 TTL 정리
+    start_janitor()
+    yield
+    shutdown_job_queue()
+    shutdown_render_queue()
 
-app = FastAPI(title="CBB Web API", version="0.1.0")
+app = FastAPI(title="CBB Web API", version="0.1.0", lifespan=lifespan)
 
 DEV_ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
+# 업로드 본문 크기 상한(받는 도중 초과하면 413)
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=DEV_ORIGINS,
@@ -25,4 +69,17 @@ app.include_router(render_router, prefix="/api/render", tags=["render"])
 
 @app.get("/health")
 async def health():
-    return {"ok": True}
\ No newline at end of file
+    models = model_status()
+    return {
+        "ok": True,
+        "ready": all(m["ready"] for m in models.values()),
+        "models": models,
+        "predictCache": predict_cache_stats(),
+        "predictTable": prediction_table_status(),
+        "genQueue": job_queue_stats(),
+        "genCache": gen_cache_stats(),
+        "render": render_status(),
+        "renderCache": render_cache_stats(),
+        "renderQueue": render_queue_stats(),
+        "tmpRenders": tmp_render_stats(),
+    }
\ No newline at end of file
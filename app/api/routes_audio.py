@@ -1,18 +1,23 @@
 # app/api/routes_audio.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 import uuid
-import tempfile
+from functools import partial
 
-from ..core.midi_render import render_wav_with_fluidsynth
+from ..core.midi_render import RenderCancelled, render_wav_with_fluidsynth
+from ..core import render_cache
+from ..core.job_queue import QueueFullError
+from ..core.render_queue import get_render_queue
+from ..core.upload_stream import MIDI_MAX_BYTES, UPLOAD_MAX_BYTES, save_upload
+from ..core.recordings_catalog import RECORD_DIR, get_recording_catalog
+from ..core import temp_renders
 
 router = APIRouter()
 
-# 프로젝트 루트/recordings (업로드/보관용)
-RECORD_DIR = Path(__file__).resolve().parents[2] / "recordings"
+# 프로젝트 루트/recordings (업로드/보관용), 목록은 SQLite 카탈로그(recordings_catalog)로 조회
 RECORD_DIR.mkdir(parents=True, exist_ok=True)
 
 
@@ -20,28 +25,36 @@ RECORD_DIR.mkdir(parents=True, exist_ok=True)
 # 기본 업로드/목록/다운로드
 # ---------------------------
 @router.post("/upload")
-async def upload_audio(audio: UploadFile = File(...)):
+async def upload_audio(audio: UploadFile = File(...), user: Optional[str] = Form(None)):
     if not audio.content_type.startswith("audio/"):
         raise HTTPException(400, "invalid file type")
     ext = "." + (audio.filename.split(".")[-1] if audio.filename and "." in audio.filename else "webm")
     file_id = f"{uuid.uuid4().hex}{ext}"
     dest = RECORD_DIR / file_id
-    dest.write_bytes(await audio.read())
-    return {"id": file_id, "url": f"/api/audio/{file_id}"}
+    # 메모리에 올리지 않고 청크 단위로 저장, 같은 패스에서 크기 상한/해시
+    size, digest = await save_upload(audio, dest, UPLOAD_MAX_BYTES)
+    get_recording_catalog().add(file_id, size, sha256=digest, user=user, content_type=audio.content_type)
+    return {"id": file_id, "url": f"/api/audio/{file_id}", "size": size, "sha256": digest}
 
 
 @router.get("/list")
-def list_audio():
-    items = []
-    for p in RECORD_DIR.iterdir():
-        if p.is_file():
-            items.append({
-                "id": p.name,
-                "size": p.stat().st_size,
-                "created": datetime.fromtimestamp(p.stat().st_ctime).isoformat(),
-            })
-    items.sort(key=lambda x: x["created"], reverse=True)
-    return items
+def list_audio(
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None, description="이전 응답의 X-Next-Cursor"),
+    user: Optional[str] = Query(default=None),
+):
+    """최신순 한 페이지(배열 형태 유지). 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서 전달."""
+    try:
+        rows, next_cursor = get_recording_catalog().page(limit=limit, cursor=cursor, user=user)
+    except ValueError:
+        raise HTTPException(400, "invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        {**r, "created": datetime.fromtimestamp(r["created"]).isoformat()}
+        for r in rows
+    ]
 
 
 @router.get("/{file_id}")
@@ -58,14 +71,28 @@ def delete_audio(file_id: str):
     if not path.exists():
         raise HTTPException(404, "not found")
     path.unlink()
+    get_recording_catalog().remove(file_id)
     return {"deleted": file_id}
 
 
 # ---------------------------
 # MIDI → WAV 렌더 (jobId 또는 업로드 파일)
 # ---------------------------
+async def _run_render(request: Request, fn, *args):
+    """렌더 전용 스레드 풀에서 실행(이벤트 루프 블로킹 방지), 큐 초과 429 · 연결 끊김 499."""
+    try:
+        return await get_render_queue().run(fn, *args, is_disconnected=request.is_disconnected)
+    except QueueFullError as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+    except RenderCancelled:
+        raise HTTPException(499, "client disconnected")
+    except Exception as e:
+        raise HTTPException(500, f"render failed: {e!s}")
+
+
 @router.post("/render-midi")
 async def render_midi(
+    request: Request,
     file: Optional[UploadFile] = File(None),
     jobId: Optional[str] = Query(default=None, description="이미 생성된 MIDI의 jobId"),
 ):
@@ -76,22 +103,19 @@ async def render_midi(
     """
     # 1) jobId 기반 (권장 경로)
     if jobId:
-        try:
-            # 순환참조 피하려고 지연 임포트
-            from .routes_tracks import _STATUS  # type: ignore
-        except Exception:
-            _STATUS = {}
+        # 순환참조 피하려고 지연 임포트
+        from .routes_tracks import get_job
 
-        info = _STATUS.get(jobId)
+        info = get_job(jobId)
         if not info:
             raise HTTPException(404, f"job not found: {jobId}")
+        if info.get("status") != "DONE":
+            raise HTTPException(409, f"job not ready: {info.get('status')}")
 
         midi_path = Path(info["midi_path"])
         wav_path = Path(info.get("wav_path", midi_path.with_suffix(".wav")))
-        try:
-            render_wav_with_fluidsynth(midi_path, wav_path, sample_rate=48000)
-        except Exception as e:
-            raise HTTPException(500, f"render failed: {e!s}")
+        if not wav_path.exists():
+            await _run_render(request, render_wav_with_fluidsynth, midi_path, wav_path, 48000)
 
         # tracks 라우터의 wav 엔드포인트를 그대로 사용
         return {"wavUrl": f"/api/tracks/{jobId}/wav"}
@@ -104,27 +128,26 @@ async def render_midi(
     if not (name.endswith(".mid") or name.endswith(".midi")):
         raise HTTPException(400, "MIDI file (.mid/.midi) only")
 
-    tmpdir = Path(tempfile.gettempdir()) / f"cbb_{uuid.uuid4().hex}"
-    tmpdir.mkdir(parents=True, exist_ok=True)
-
+    # 렌더마다 고유 id 폴더(TTL janitor 가 정리), URL 은 id 로 바로 경로 계산
+    render_id, tmpdir = temp_renders.new_render()
     midi_path = tmpdir / "input.mid"
-    wav_path = tmpdir / "output.wav"
-    midi_path.write_bytes(await file.read())
-
+    wav_path = tmpdir / temp_renders.OUTPUT_NAME
     try:
-        render_wav_with_fluidsynth(midi_path, wav_path, sample_rate=48000)
-    except Exception as e:
-        raise HTTPException(500, f"render failed: {e!s}")
+        _, digest = await save_upload(file, midi_path, MIDI_MAX_BYTES)
+        # 같은 MIDI 를 다시 올리면(프론트가 생성 MIDI 를 반복 업로드) 렌더 캐시에서 하드링크만
+        await _run_render(request, partial(render_cache.render_to, midi_sha256=digest), midi_path, wav_path, 48000)
+    except Exception:
+        temp_renders.discard(render_id)
+        raise
 
     # 임시 wav 파일 서빙용 엔드포인트
-    return {"wavUrl": f"/api/audio/tmp/{wav_path.name}", "tmpDir": str(tmpdir)}
+    return {"wavUrl": f"/api/audio/tmp/{render_id}.wav", "tmpDir": str(tmpdir)}
 
 
 @router.get("/tmp/{name}")
 def get_tmp_audio(name: str):
     """render-midi(업로드)용 임시 wav 파일 제공"""
-    base = Path(tempfile.gettempdir())
-    p = next(base.glob(f"cbb_*/{name}"), None)
-    if not p or not p.exists():
+    p = temp_renders.lookup(name[:-4] if name.endswith(".wav") else name)
+    if p is None:
         raise HTTPException(404, "not found")
     return FileResponse(p, media_type="audio/wav", filename=name)
\ No newline at end of file
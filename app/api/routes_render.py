@@ -1,9 +1,16 @@
 # app/api/routes_render.py (발췌)
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from fastapi.responses import FileResponse
 from pathlib import Path
 from typing import Optional
 import shutil, subprocess, uuid, wave, os, tempfile
+from functools import partial
+
+from ..core.midi_render import RenderCancelled, find_sf2, get_render_service
+from ..core.job_queue import QueueFullError
+from ..core.render_queue import get_render_queue
+from ..core import audio_encode, render_cache
+from ..core.upload_stream import MIDI_MAX_BYTES, save_upload
 
 router = APIRouter()
 
@@ -14,30 +21,18 @@ RENDER_DIR.mkdir(parents=True, exist_ok=True)
 def which(cmd: str) -> Optional[str]:
     return shutil.which(cmd)
 
-def find_sf2() -> Optional[Path]:
-    """
-    우선순위: 환경변수(CBB_SOUNDFONT_PATH → SF2_PATH) → 프로젝트 자산 → 시스템 기본 경로
-    """
-    env_candidates = [
-        os.environ.get("CBB_SOUNDFONT_PATH"),
-        os.environ.get("SF2_PATH"),
-    ]
-    file_candidates = [
-        BASE_DIR / "app" / "assets" / "sf2" / "GeneralUserGS.sf2",
-        Path("/opt/homebrew/share/soundfonts/FluidR3_GM.sf2"),
-        Path("/usr/share/sounds/sf2/FluidR3_GM.sf2"),
-    ]
-    for c in [*env_candidates, *file_candidates]:
-        if not c:
-            continue
-        p = Path(c)
-        if p.exists():
-            return p
-    return None
+def _pick_format(request: Request, format: Optional[str]) -> str:
+    try:
+        return audio_encode.pick_format(format, request.headers.get("accept"))
+    except audio_encode.UnsupportedFormat as e:
+        raise HTTPException(400, str(e))
+
 
 @router.post("/midi-to-wav")
-async def midi_to_wav(midi: UploadFile = File(...)):
-    if not which("fluidsynth"):
+async def midi_to_wav(request: Request, midi: UploadFile = File(...), format: Optional[str] = None):
+    service = get_render_service()
+    fmt = _pick_format(request, format)
+    if not service.embedded and not which("fluidsynth"):
         raise HTTPException(
             501,
             "fluidsynth CLI를 찾지 못했습니다. (컨테이너라면 apt-get으로 fluidsynth 설치 필요)"
@@ -51,35 +46,45 @@ async def midi_to_wav(midi: UploadFile = File(...)):
             "혹은 app/assets/sf2/GeneralUserGS.sf2 배치가 필요합니다."
         )
 
-    with tempfile.TemporaryDirectory() as td:
-        tmp_mid = Path(td) / "in.mid"
-        tmp_wav = Path(td) / "out.wav"
-        tmp_mid.write_bytes(await midi.read())
-
-        cmd = [
-            "fluidsynth",
-            "-ni",
-            "-F", str(tmp_wav),
-            "-T", "wav",
-            str(sf2),
-            str(tmp_mid),
-        ]
-        try:
-            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        except subprocess.TimeoutExpired:
-            raise HTTPException(504, "fluidsynth 렌더 타임아웃(120s)")
+    # 상주 신스 풀로 렌더(SF2 재로딩 없음), 불가하면 CLI 폴백. 샘플레이트는 CLI 기본값(44.1kHz) 유지
+    # (Opus 는 44.1kHz 를 지원하지 않아 48kHz)
+    # 같은 MIDI 바이트/SF2/샘플레이트면 렌더 캐시에서 재사용, 원본 wav 도 renders/ 에 남김
+    # → /api/render/{id}?format= 로 다른 포맷 요청 시 재렌더 없이 인코딩
+    sample_rate = 48000 if fmt == "opus" else 44100
+    stem = uuid.uuid4().hex
+    wav_path = RENDER_DIR / f"{stem}.wav"
+    # 블로킹 렌더는 렌더 전용 스레드 풀에서(이벤트 루프는 계속 다른 요청 처리), 연결이 끊기면 중단
+    # 업로드는 청크 단위로 임시 파일에 쓰면서 해시 → 그 해시가 곧 렌더 캐시 키
+    try:
+        with tempfile.TemporaryDirectory() as td:
+            tmp_mid = Path(td) / "in.mid"
+            _, digest = await save_upload(midi, tmp_mid, MIDI_MAX_BYTES)
+            out_path = await get_render_queue().run(
+                partial(render_cache.render_to, midi_sha256=digest), tmp_mid, wav_path, sample_rate, fmt,
+                is_disconnected=request.is_disconnected,
+            )
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+    except RenderCancelled:
+        raise HTTPException(499, "client disconnected")
+    except (TimeoutError, subprocess.TimeoutExpired):
+        raise HTTPException(504, f"fluidsynth 렌더 타임아웃({service.timeout:.0f}s)")
+    except subprocess.CalledProcessError as e:
+        detail = (e.stderr or e.stdout or "").strip()
+        raise HTTPException(500, f"fluidsynth 렌더 실패: {detail[:4000]}")
+    except Exception as e:
+        raise HTTPException(500, f"fluidsynth 렌더 실패: {e!s}")
 
-        if proc.returncode != 0 or not tmp_wav.exists():
-            detail = (proc.stderr or proc.stdout or "").strip()
-            raise HTTPException(500, f"fluidsynth 렌더 실패: {detail[:4000]}")
+    if not out_path.exists():
+        raise HTTPException(500, "fluidsynth 렌더 실패: 출력 파일 없음")
 
-        out_id = f"{uuid.uuid4().hex}.wav"
-        out_path = RENDER_DIR / out_id
-        shutil.move(str(tmp_wav), out_path)
+    out_id = out_path.name
 
     duration = 0.0
     try:
-        with wave.open(str(out_path), "rb") as wf:
+        with wave.open(str(wav_path), "rb") as wf:
             frames = wf.getnframes()
             fr = wf.getframerate()
             duration = frames / float(fr)
@@ -87,12 +92,21 @@ async def midi_to_wav(midi: UploadFile = File(...)):
         # duration 계산
         duration = 0.0
 
-    return {"id": out_id, "url": f"/api/render/{out_id}", "duration": duration}
+    return {"id": out_id, "url": f"/api/render/{out_id}", "duration": duration, "format": fmt}
 
 @router.get("/{file_id}")
-def get_render(file_id: str):
+def get_render(file_id: str, request: Request, format: Optional[str] = None):
     path = RENDER_DIR / file_id
     if not path.exists():
         raise HTTPException(404, "not found")
-    # wav만 반환하고 싶다면 media_type="audio/wav" 지정 가능
-    return FileResponse(path)  # , media_type="audio/wav"
\ No newline at end of file
+    fmt = _pick_format(request, format)
+    # wav 렌더는 format=/Accept 에 따라 인코딩본(같은 id 의 다른 확장자, 한 번만 생성)으로 응답
+    if path.suffix == ".wav" and fmt != "wav":
+        try:
+            path = audio_encode.encode(path, fmt)
+        except audio_encode.UnsupportedFormat as e:
+            if format:
+                raise HTTPException(400, str(e))
+        except Exception as e:
+            raise HTTPException(500, f"encode failed: {e!s}")
+    return FileResponse(path, media_type=audio_encode.media_type_for(path), headers={"Vary": "Accept"})
\ No newline at end of file
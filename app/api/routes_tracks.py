@@ -1,53 +1,73 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+from typing import Optional
+import uuid
+from starlette.concurrency import run_in_threadpool
 from ..core.schemas import GenerateRequest, JobResponse, StatusResponse
-from ..core.pipeline_generate import make_track
+from ..core.job_queue import get_job_queue, QueueFullError
+from ..core.render_queue import get_render_queue
+from ..core.job_store import get_job_store, JOBS_DIR
+from ..core import gen_cache
+from ..core.lazy_musicxml import ensure_musicxml
 
 # fluidsynth 래퍼(프로젝트에 있는 것 사용)
-from ..core.midi_render import render_wav_with_fluidsynth
+from ..core.midi_render import RenderCancelled, get_render_service, render_wav_with_fluidsynth
+from ..core.wav_stream import stream_length, stream_wav
+from ..core import audio_encode
 
 router = APIRouter()
 
-# 개발 단계: 메모리 상태 저장 (간단 캐시)
-_STATUS: dict[str, dict] = {}
+# 작업 상태는 SQLite(WAL) 레지스트리에 저장 → 여러 워커/재시작 간 공유 (JOBS_DIR = app/jobs)
+
+def _update_status(job_id: str, **fields) -> None:
+    if "midi_path" in fields and "wav_path" not in fields:
+        fields["wav_path"] = str(Path(fields["midi_path"]).with_suffix(".wav"))  # 아직 없을 수 있음 → 요청 시 생성
+    get_job_store().update(job_id, **fields)
+
+
+def get_job(job_id: str):
+    return get_job_store().get(job_id)
+
+
+def _get_done(job_id: str) -> dict:
+    """DONE 상태의 작업 정보. 없으면 404, 아직 생성 중이면 409."""
+    info = get_job(job_id)
+    if not info:
+        raise HTTPException(404, "job not found")
+    if info["status"] != "DONE":
+        raise HTTPException(409, f"job not ready: {info['status']}")
+    return info
 
-# 결과 파일 저장 위치 (현재 파일: app/api/routes_tracks.py → parents[1] == app 디렉토리)
-APP_DIR = Path(__file__).resolve().parents[1]   # .../app
-JOBS_DIR = APP_DIR / "jobs"
 
 @router.post("/generate", response_model=JobResponse)
 def generate(req: GenerateRequest):
     # outdir는 make_track 내부에서 ensure_dir 처리하지만, 여기서도 한 번 보장해둠
     JOBS_DIR.mkdir(parents=True, exist_ok=True)
 
-    result = make_track(req.genre, req.progression, req.tempo, req.options, JOBS_DIR)
-    # result: {"job_id": "...", "midi_path": "...", "xml_path": "..."}
-
-    wav_path = str(Path(result["midi_path"]).with_suffix(".wav"))
-
-    _STATUS[result["job_id"]] = {
-        "status": "DONE",
-        "progress": 100,
-        **result,
-        "wav_path": wav_path,  # 아직 없을 수 있음 → 요청 시 생성
-    }
-    return {"jobId": result["job_id"]}
+    # 작업 큐에 넣고 jobId 즉시 반환 → /status/{job_id} 로 진행률 확인
+    job_id = uuid.uuid4().hex[:8]
+    try:
+        get_job_queue().submit(
+            job_id, _update_status,
+            req.genre, req.progression, req.tempo, req.options, JOBS_DIR,
+        )
+    except QueueFullError as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+    return {"jobId": job_id}
 
 
 @router.get("/status/{job_id}", response_model=StatusResponse)
 def status(job_id: str):
-    info = _STATUS.get(job_id)
+    info = get_job(job_id)
     if not info:
         raise HTTPException(404, "job not found")
-    return {"status": info["status"], "progress": info["progress"]}
+    return {"status": info["status"], "progress": info["progress"], "error": info.get("error")}
 
 
 @router.get("/{job_id}/midi")
 def download_midi(job_id: str):
-    info = _STATUS.get(job_id)
-    if not info:
-        raise HTTPException(404, "job not found")
+    info = _get_done(job_id)
     midi_path = Path(info["midi_path"])
     if not midi_path.exists():
         raise HTTPException(404, "midi not found")
@@ -56,36 +76,109 @@ def download_midi(job_id: str):
 
 @router.get("/{job_id}/musicxml")
 def download_xml(job_id: str):
-    info = _STATUS.get(job_id)
-    if not info:
-        raise HTTPException(404, "job not found")
+    info = _get_done(job_id)
     xml_path = Path(info["xml_path"])
     if not xml_path.exists():
-        raise HTTPException(404, "musicxml not found")
+        # 생성 시에는 MIDI 만 작성 → 첫 요청 때 parts_data 로 생성(동시 요청은 한 번의 빌드를 공유)
+        parts_path = info.get("parts_path")
+        try:
+            built = ensure_musicxml(xml_path, Path(parts_path) if parts_path else None)
+        except Exception as e:
+            raise HTTPException(500, f"musicxml build failed: {e!s}")
+        if built is None:
+            raise HTTPException(404, "musicxml not found")
+        if info.get("cache_key"):
+            try:
+                gen_cache.store(info["cache_key"], [xml_path])
+            except Exception as e:
+                print(f"⚠️  gen cache 저장 실패: {e}")
     # 필요하면 미디어 타입을 MusicXML로 변경 가능:
     # "application/vnd.recordare.musicxml+xml"
     return FileResponse(str(xml_path), media_type="application/xml", filename=f"{job_id}.xml")
 
 
+def _cache_audio(info: dict, wav: Path) -> None:
+    # 시드 고정 작업이면 렌더/인코딩 결과도 생성 캐시에 보관 → 다음 히트는 오디오까지 재사용
+    if info.get("cache_key") and wav.exists():
+        try:
+            gen_cache.store(info["cache_key"], [wav])
+        except Exception as e:
+            print(f"⚠️  gen cache 저장 실패: {e}")
+
+
 # 기존 @router.get("/{job_id}/wav") 를 아래로 교체
 @router.api_route("/{job_id}/wav", methods=["GET", "HEAD", "POST"])
-def download_wav(job_id: str):
-    info = _STATUS.get(job_id)
-    if not info:
-        raise HTTPException(404, "job not found")
+async def download_wav(job_id: str, request: Request, stream: bool = True, format: Optional[str] = None):
+    info = await run_in_threadpool(_get_done, job_id)
 
     midi = Path(info["midi_path"])
     wav  = Path(info.get("wav_path", midi.with_suffix(".wav")))
 
-    # 파일이 없으면 여기서 렌더(아이들포스트/헤드 대비)
+    # format=flac|opus|mp3 또는 Accept 헤더 → 압축 포맷(job 폴더에 캐시), 기본 wav
+    try:
+        fmt = audio_encode.pick_format(format, request.headers.get("accept"))
+    except audio_encode.UnsupportedFormat as e:
+        raise HTTPException(400, str(e))
+    vary = {"Vary": "Accept"}
+    streamable = fmt == "wav" and stream and get_render_service().embedded
+    wav_headers = {
+        "Content-Disposition": f'attachment; filename="{job_id}.wav"',
+        "Cache-Control": "no-store",      # 완성 후에는 FileResponse(Range/ETag)로 응답
+        **vary,
+    }
+
+    # HEAD 는 렌더하지 않음: GET 이 스트리밍할 수 있으면 그 응답 길이(MIDI 로 계산)만 알려주고, 아니면 404
+    if request.method == "HEAD" and not wav.exists():
+        if not streamable or not midi.exists():
+            raise HTTPException(404, "wav not rendered yet")
+        try:
+            total = await run_in_threadpool(stream_length, midi, 48000)
+        except Exception as e:
+            raise HTTPException(500, f"midi read failed: {e!s}")
+        return Response(media_type="audio/wav", headers={"Content-Length": str(total), **wav_headers})
+
+    # GET 은 렌더 큐 슬롯에서 렌더하면서 바로 전송(헤더 먼저 + PCM 청크), 끝나면 job 폴더에 WAV 로 남음
+    # (큐 초과 429, 따라 읽는 응답이 모두 끊기면 렌더 취소)
+    if streamable and not wav.exists() and request.method == "GET":
+        if not midi.exists():
+            raise HTTPException(404, "midi not found")
+        try:
+            started = await run_in_threadpool(stream_wav, midi, wav, 48000, lambda p: _cache_audio(info, p))
+        except QueueFullError as e:
+            raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+        except Exception as e:
+            raise HTTPException(500, f"render failed: {e!s}")
+        if started is not None:
+            total, chunks = started
+            return StreamingResponse(chunks, media_type="audio/wav",
+                                     headers={"Content-Length": str(total), **wav_headers})
+
+    # 파일이 없으면 여기서 렌더(POST, ?stream=false, CLI 백엔드) → 렌더 큐(동시 렌더 상한/429, 끊기면 취소)
     if not wav.exists():
         try:
-            render_wav_with_fluidsynth(midi, wav, sample_rate=48000)
+            await get_render_queue().run(render_wav_with_fluidsynth, midi, wav, 48000,
+                                         is_disconnected=request.is_disconnected)
+        except QueueFullError as e:
+            raise HTTPException(429, str(e), headers={"Retry-After": "5"})
+        except RenderCancelled:
+            raise HTTPException(499, "client disconnected")
         except Exception as e:
             raise HTTPException(500, f"render failed: {e!s}")
+        await run_in_threadpool(_cache_audio, info, wav)
 
     if not wav.exists():
         raise HTTPException(500, "wav not created")
 
+    out = wav
+    if fmt != "wav":
+        fresh = not audio_encode.encoded_path(wav, fmt).exists()
+        try:
+            out = await run_in_threadpool(audio_encode.encode, wav, fmt)
+        except Exception as e:
+            raise HTTPException(500, f"encode failed: {e!s}")
+        if fresh:
+            await run_in_threadpool(_cache_audio, info, out)
+
     # Range/HEAD 대응은 FileResponse가 처리
-    return FileResponse(wav, media_type="audio/wav", filename=f"{job_id}.wav")
\ No newline at end of file
+    return FileResponse(out, media_type=audio_encode.media_type(fmt),
+                        filename=f"{job_id}{out.suffix}", headers=vary)
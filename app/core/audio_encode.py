@@ -0,0 +1,141 @@
+# app/core/audio_encode.py
+"""
+렌더된 WAV → 압축 포맷(FLAC / OGG-Opus / MP3) 인코딩.
+
+- 프로세스 안에서 libsndfile(soundfile)로 블록 단위 변환 → 외부 ffmpeg 프로세스 없음, 메모리 일정
+- 결과는 WAV 옆(<이름>.flac 등)에 캐시. 같은 파일의 동시 요청은 경로별 Lock 으로 한 번만 인코딩
+- 포맷 선택: format= 파라미터가 우선, 없으면 Accept 헤더(q 값)로 결정. 동률/와일드카드는 wav
+  (wav 는 스트리밍 렌더와 Range 재생이 가능하므로 명시적으로 더 선호할 때만 압축 포맷을 고른다)
+"""
+from __future__ import annotations
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import soundfile as sf   # libsndfile 1.1+ 면 MP3/Opus 포함(휠에 번들)
+except (ImportError, OSError):
+    sf = None
+
+# 이름: (media type, 확장자, libsndfile format, subtype)
+FORMATS: Dict[str, tuple] = {
+    "wav":  ("audio/wav", ".wav", None, None),
+    "flac": ("audio/flac", ".flac", "FLAC", "PCM_16"),
+    "opus": ("audio/ogg; codecs=opus", ".opus", "OGG", "OPUS"),
+    "mp3":  ("audio/mpeg", ".mp3", "MP3", "MPEG_LAYER_III"),
+}
+_ALIASES = {"ogg": "opus", "x-flac": "flac", "mpeg": "mp3", "x-wav": "wav", "wave": "wav", "vnd.wave": "wav"}
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+BLOCK_FRAMES = 64 * 1024
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def normalize_format(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    name = name.strip().lower().lstrip(".")
+    name = _ALIASES.get(name, name)
+    if name not in FORMATS:
+        raise UnsupportedFormat(f"unsupported format: {name} (wav|flac|opus|mp3)")
+    return name
+
+
+def available(name: str) -> bool:
+    if name == "wav":
+        return True
+    if sf is None:
+        return False
+    _, _, fmt, subtype = FORMATS[name]
+    return fmt in sf.available_formats() and subtype in sf.available_subtypes(fmt)
+
+
+def media_type(name: str) -> str:
+    return FORMATS[name][0]
+
+
+def media_type_for(path: Path) -> Optional[str]:
+    suffix = Path(path).suffix.lower()
+    return next((v[0] for v in FORMATS.values() if v[1] == suffix), None)
+
+
+def from_accept(accept: Optional[str]) -> str:
+    """Accept 헤더에서 지원 포맷 중 q 가 가장 높은 것. 동률이면 wav → flac → opus → mp3 순."""
+    best, best_q = "wav", -1.0
+    order = list(FORMATS)
+    for item in (accept or "").split(","):
+        parts = [p.strip() for p in item.split(";")]
+        mime = parts[0].lower()
+        q = 1.0
+        for p in parts[1:]:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if not mime.startswith("audio/") or mime == "audio/*":
+            continue
+        try:
+            name = normalize_format(mime.split("/", 1)[1])
+        except UnsupportedFormat:
+            continue
+        if q <= 0 or not available(name):
+            continue
+        if q > best_q or (q == best_q and order.index(name) < order.index(best)):
+            best, best_q = name, q
+    return best
+
+
+def pick_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    """format= 명시가 있으면 그대로(지원 안 되면 UnsupportedFormat), 없으면 Accept 협상."""
+    name = normalize_format(fmt)
+    if name is None:
+        return from_accept(accept)
+    if not available(name):
+        raise UnsupportedFormat(f"encoder for {name} not available (soundfile/libsndfile 필요)")
+    return name
+
+
+def encoded_path(wav_path: Path, name: str) -> Path:
+    return Path(wav_path).with_suffix(FORMATS[name][1])
+
+
+def encode(wav_path: Path, name: str) -> Path:
+    """wav_path 를 name 포맷으로 인코딩(이미 있으면 재사용)해 경로 반환."""
+    wav_path = Path(wav_path)
+    if name == "wav":
+        return wav_path
+    out = encoded_path(wav_path, name)
+    if out.exists():
+        return out
+    if not available(name):
+        raise UnsupportedFormat(f"encoder for {name} not available (soundfile/libsndfile 필요)")
+    _, _, fmt, subtype = FORMATS[name]
+
+    with _LOCKS_GUARD:
+        lock = _LOCKS.setdefault(str(out), threading.Lock())
+    with lock:
+        if out.exists():
+            return out
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        try:
+            with sf.SoundFile(str(wav_path)) as src:
+                if name == "opus" and src.samplerate not in OPUS_RATES:
+                    raise UnsupportedFormat(f"opus needs {OPUS_RATES} Hz (got {src.samplerate})")
+                with sf.SoundFile(str(tmp), "w", samplerate=src.samplerate, channels=src.channels,
+                                  format=fmt, subtype=subtype) as dst:
+                    for block in src.blocks(blocksize=BLOCK_FRAMES, dtype="int16"):
+                        dst.write(block)
+            os.replace(tmp, out)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+    with _LOCKS_GUARD:
+        _LOCKS.pop(str(out), None)
+    return out
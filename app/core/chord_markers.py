@@ -8,21 +8,19 @@ def _beat_and_bar_ticks(ticks_per_beat: int, time_sig: Tuple[int, int]) -> Tuple
     bar_ticks  = beat_ticks * numer
     return beat_ticks, bar_ticks
 
-def inject_chord_markers(
-    midi_path: str,
+def build_chord_marker_track(
+    ticks_per_beat: int,
     progression: Iterable[str],
-    tempo_bpm: float,
     time_sig: Tuple[int, int] = (4, 4),
     repeat: int = 1,
     bars_per_chord: int = 1,
     track_name: str = "Chord Markers",
-) -> None:
+) -> MidiTrack:
     """
-    최종 MIDI(이미 트리밍/반복 적용됨)에 '코드 마커' 트랙을 추가한다.
+    '코드 마커' 트랙을 만든다(파일 I/O 없음).
     progression 을 repeat 회 반복하며 각 코드마다 bars_per_chord 마디 길이로 마커 삽입.
     """
-    mid = MidiFile(midi_path)
-    _, bar_ticks = _beat_and_bar_ticks(mid.ticks_per_beat, time_sig)
+    _, bar_ticks = _beat_and_bar_ticks(ticks_per_beat, time_sig)
 
     # (1) 절대틱 기반 큐 생성
     abs_events: List[Tuple[int, str]] = []
@@ -43,7 +41,24 @@ def inject_chord_markers(
         tr.append(MetaMessage("marker", text=str(text), time=delta))
         cur = t_abs
     tr.append(MetaMessage("end_of_track", time=0))
+    return tr
 
-    # (3) 붙이고 저장
-    mid.tracks.append(tr)
-    mid.save(midi_path)
\ No newline at end of file
+def inject_chord_markers(
+    midi_path: str,
+    progression: Iterable[str],
+    tempo_bpm: float,
+    time_sig: Tuple[int, int] = (4, 4),
+    repeat: int = 1,
+    bars_per_chord: int = 1,
+    track_name: str = "Chord Markers",
+) -> None:
+    """
+    최종 MIDI(이미 트리밍/반복 적용됨) 파일에 '코드 마커' 트랙을 추가해 다시 저장한다.
+    (make_track 은 메모리 상에서 build_chord_marker_track 을 직접 사용)
+    """
+    mid = MidiFile(midi_path)
+    mid.tracks.append(build_chord_marker_track(
+        mid.ticks_per_beat, progression, time_sig,
+        repeat=repeat, bars_per_chord=bars_per_chord, track_name=track_name,
+    ))
+    mid.save(midi_path)
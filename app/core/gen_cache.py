@@ -0,0 +1,176 @@
+# app/core/gen_cache.py
+"""
+make_track 결과의 content-addressed 캐시.
+
+- 키: (장르, 진행, 템포, 옵션(스타일), repeats, bars_per_chord, seed) 정규화 JSON 의 SHA-256
+  seed 가 없으면 생성이 랜덤이라 캐시하지 않음
+- 저장: CBB_GEN_CACHE_DIR/<key>/ 에 MIDI/MusicXML(+렌더된 WAV)
+- 히트: 새 job 폴더에 하드링크(불가하면 복사) → 생성 단계 전체 생략
+- 인덱스/카운터는 SQLite(WAL) → 작업 큐 자식 프로세스/여러 워커가 공유
+- 전체 바이트가 CBB_GEN_CACHE_MAX_BYTES 를 넘으면 last_used 오래된 항목부터 삭제(LRU)
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+APP_DIR = Path(__file__).resolve().parents[1]   # .../app
+GEN_CACHE_DIR = Path(os.environ.get("CBB_GEN_CACHE_DIR", str(APP_DIR / "gen_cache")))
+GEN_CACHE_MAX_BYTES = int(os.environ.get("CBB_GEN_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+GEN_CACHE_VERSION = 2   # 생성 로직이 바뀌면 올려서 기존 캐시 무효화
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT PRIMARY KEY,
+    files     TEXT NOT NULL,
+    bytes     INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0);
+"""
+
+_local = threading.local()
+
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        GEN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(GEN_CACHE_DIR / "index.sqlite3"), timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def cache_key(genre: str, progression, tempo, options: Dict, repeats: int, bars_per_chord: int,
+              seed: Optional[int]) -> Optional[str]:
+    """정규화된 입력 해시. seed 가 없으면(랜덤 생성) None."""
+    if seed is None:
+        return None
+    opts = {k: v for k, v in (options or {}).items() if k not in ("repeats", "bars_per_chord", "seed")}
+    payload = {
+        "v": GEN_CACHE_VERSION,
+        "genre": genre,
+        "progression": [str(c) for c in progression],
+        "tempo": int(tempo),
+        "options": opts,
+        "repeats": int(repeats),
+        "bars_per_chord": int(bars_per_chord),
+        "seed": int(seed),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str) -> None:
+    _conn().execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def restore(key: str, job_dir: Path) -> Optional[Dict[str, str]]:
+    """히트면 캐시 파일들을 job_dir 로 링크하고 {파일명: 경로} 반환, 미스면 None."""
+    conn = _conn()
+    row = conn.execute("SELECT files FROM entries WHERE key = ?", (key,)).fetchone()
+    entry_dir = GEN_CACHE_DIR / key
+    if row is None or not entry_dir.exists():
+        _count("misses")
+        return None
+
+    job_dir.mkdir(parents=True, exist_ok=True)
+    out: Dict[str, str] = {}
+    try:
+        for name in json.loads(row[0]):
+            dst = job_dir / name
+            if not dst.exists():
+                _link_or_copy(entry_dir / name, dst)
+            out[name] = str(dst)
+    except FileNotFoundError:
+        # 다른 프로세스가 막 지웠음 → 미스로 처리
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        _count("misses")
+        return None
+    conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+    _count("hits")
+    return out
+
+
+def store(key: str, paths: List[Path]) -> None:
+    """생성 결과 파일들을 캐시에 추가(이미 있으면 파일만 보강)."""
+    conn = _conn()
+    entry_dir = GEN_CACHE_DIR / key
+    if not entry_dir.exists():
+        tmp_dir = GEN_CACHE_DIR / f".tmp-{uuid.uuid4().hex}"
+        tmp_dir.mkdir(parents=True)
+        try:
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)   # 동시에 다른 프로세스가 만듦
+
+    for p in paths:
+        p = Path(p)
+        dst = entry_dir / p.name
+        if p.exists() and not dst.exists():
+            tmp = entry_dir / f".{p.name}.{uuid.uuid4().hex}"
+            _link_or_copy(p, tmp)
+            os.replace(tmp, dst)
+
+    files = sorted(f.name for f in entry_dir.iterdir() if not f.name.startswith("."))
+    size = sum((entry_dir / f).stat().st_size for f in files)
+    conn.execute(
+        "INSERT INTO entries (key, files, bytes, last_used) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET files = excluded.files, bytes = excluded.bytes, last_used = excluded.last_used",
+        (key, json.dumps(files), size, time.time()),
+    )
+    evict()
+
+
+def evict(max_bytes: int = GEN_CACHE_MAX_BYTES) -> int:
+    """총 바이트가 max_bytes 이하가 될 때까지 LRU 삭제. 삭제한 항목 수 반환."""
+    conn = _conn()
+    total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+    removed = 0
+    while total > max_bytes:
+        row = conn.execute("SELECT key, bytes FROM entries ORDER BY last_used LIMIT 1").fetchone()
+        if row is None:
+            break
+        key, size = row
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(GEN_CACHE_DIR / key, ignore_errors=True)   # job 폴더의 하드링크는 그대로 남음
+        total -= size
+        removed += 1
+    return removed
+
+
+def gen_cache_stats() -> dict:
+    conn = _conn()
+    counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries").fetchone()
+    hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+    return {
+        "entries": entries,
+        "bytes": size,
+        "maxBytes": GEN_CACHE_MAX_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "hitRate": (hits / (hits + misses)) if (hits + misses) else 0.0,
+    }
@@ -0,0 +1,160 @@
+# app/core/job_queue.py
+"""
+트랙 생성(make_track) 작업 큐.
+
+- music21 작업은 CPU/GIL 바운드라 작업마다 별도 프로세스에서 실행(forkserver 에 pipeline_generate 미리 로드)
+- 동시 실행 수(CBB_GEN_CONCURRENCY) 만큼의 러너 스레드가 프로세스를 띄우고 결과/진행률을 파이프로 받음
+- 대기+실행 중 작업이 CBB_GEN_QUEUE_MAX 를 넘으면 QueueFullError (→ 429)
+- 작업당 CBB_GEN_TIMEOUT 초를 넘기면 프로세스를 종료하고 ERROR
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+GEN_CONCURRENCY = int(os.environ.get("CBB_GEN_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2))))
+GEN_QUEUE_MAX = int(os.environ.get("CBB_GEN_QUEUE_MAX", "16"))
+GEN_TIMEOUT = float(os.environ.get("CBB_GEN_TIMEOUT", "180"))
+GEN_MP_START = os.environ.get("CBB_GEN_MP_START", "forkserver")
+
+# on_update(job_id, **fields): 상태 저장소 갱신 콜백 (status/progress/결과 경로/error)
+UpdateFn = Callable[..., None]
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _job_entry(conn, job_id: str, genre, progression, tempo, options, outdir: str) -> None:
+    """자식 프로세스 진입점: 진행률/결과를 파이프로 보낸다."""
+    from .pipeline_generate import make_track
+    try:
+        result = make_track(
+            genre, progression, tempo, options, Path(outdir),
+            job_id=job_id,
+            on_progress=lambda pct: conn.send(("progress", int(pct))),
+        )
+        conn.send(("done", result))
+    except Exception as e:
+        conn.send(("error", f"{e!s}\n{traceback.format_exc(limit=5)}"))
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    def __init__(self, concurrency: int = GEN_CONCURRENCY, max_queue: int = GEN_QUEUE_MAX,
+                 timeout: float = GEN_TIMEOUT):
+        self.concurrency = max(1, int(concurrency))
+        self.max_queue = max(self.concurrency, int(max_queue))
+        self.timeout = float(timeout)
+        self._ctx = mp.get_context(GEN_MP_START)
+        if GEN_MP_START == "forkserver":
+            self._ctx.set_forkserver_preload(["app.core.pipeline_generate"])
+        self._runners = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="gen-runner")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+
+    def submit(self, job_id: str, on_update: UpdateFn, genre, progression, tempo, options, outdir: Path) -> None:
+        with self._lock:
+            if self._queued + self._running >= self.max_queue:
+                raise QueueFullError(f"generation queue full ({self.max_queue})")
+            self._queued += 1
+        on_update(job_id, status="QUEUED", progress=0)
+        self._runners.submit(self._run, job_id, on_update, genre, progression, tempo, options, str(outdir))
+
+    def _run(self, job_id, on_update: UpdateFn, genre, progression, tempo, options, outdir) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            on_update(job_id, status="RUNNING", progress=5)
+            self._run_process(job_id, on_update, genre, progression, tempo, options, outdir)
+        except Exception as e:
+            on_update(job_id, status="ERROR", progress=100, error=str(e))
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _run_process(self, job_id, on_update: UpdateFn, genre, progression, tempo, options, outdir) -> None:
+        parent, child = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_job_entry,
+            args=(child, job_id, genre, progression, tempo, options, outdir),
+            name=f"gen-{job_id}",
+            daemon=True,
+        )
+        proc.start()
+        child.close()
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    proc.kill()
+                    on_update(job_id, status="ERROR", progress=100, error=f"timeout ({self.timeout:.0f}s)")
+                    return
+                if not parent.poll(min(remaining, 1.0)):
+                    if not proc.is_alive() and not parent.poll():
+                        on_update(job_id, status="ERROR", progress=100,
+                                  error=f"worker exited ({proc.exitcode})")
+                        return
+                    continue
+                kind, payload = parent.recv()
+                if kind == "progress":
+                    on_update(job_id, status="RUNNING", progress=max(5, min(99, payload)))
+                elif kind == "done":
+                    fields = {k: v for k, v in payload.items() if k != "job_id"}
+                    on_update(job_id, status="DONE", progress=100, **fields)
+                    return
+                else:
+                    on_update(job_id, status="ERROR", progress=100, error=str(payload))
+                    return
+        except EOFError:
+            on_update(job_id, status="ERROR", progress=100, error=f"worker exited ({proc.exitcode})")
+        finally:
+            parent.close()
+            proc.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "concurrency": self.concurrency,
+                "maxQueue": self.max_queue,
+                "timeout": self.timeout,
+            }
+
+    def shutdown(self) -> None:
+        self._runners.shutdown(wait=False, cancel_futures=True)
+
+
+_QUEUE: Optional[JobQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = JobQueue()
+        return _QUEUE
+
+
+def job_queue_stats() -> dict:
+    return _QUEUE.stats() if _QUEUE is not None else {"queued": 0, "running": 0}
+
+
+def shutdown_job_queue() -> None:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is not None:
+            _QUEUE.shutdown()
+            _QUEUE = None
@@ -0,0 +1,136 @@
+# app/core/job_store.py
+"""
+트랙 생성 작업 레지스트리(SQLite, WAL).
+
+- uvicorn 워커 여러 개가 같은 DB 파일을 공유 → 어느 워커가 만든 job 이든 /status, /midi, /wav 조회 가능
+- job_id PRIMARY KEY 로 인덱스 조회, 결과 경로 등 부가 정보는 JSON 컬럼
+- 시작 시 recover(): JOBS_DIR/<id>/ 에 파일은 있는데 DB 에 없는 작업을 복구하고,
+  오래 멈춘 QUEUED/RUNNING(죽은 프로세스의 작업)은 ERROR 로 정리
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+APP_DIR = Path(__file__).resolve().parents[1]   # .../app
+JOBS_DIR = APP_DIR / "jobs"
+JOB_DB_PATH = Path(os.environ.get("CBB_JOB_DB", str(JOBS_DIR / "jobs.sqlite3")))
+
+# 이 시간(초) 넘게 갱신이 없는 QUEUED/RUNNING 은 복구 시 ERROR 처리
+STALE_AFTER = float(os.environ.get("CBB_JOB_STALE_AFTER", "900"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id   TEXT PRIMARY KEY,
+    status   TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    data     TEXT NOT NULL DEFAULT '{}',
+    created  REAL NOT NULL,
+    updated  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs(status, updated);
+"""
+
+
+class JobStore:
+    def __init__(self, db_path: Path = JOB_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션(WAL: 읽기는 쓰기를 막지 않음)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT status, progress, data FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, progress, data = row
+        return {**json.loads(data), "status": status, "progress": progress}
+
+    def update(self, job_id: str, **fields) -> dict:
+        """upsert. status/progress 는 컬럼, 나머지 필드는 data JSON 에 병합."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status, progress, data FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            status, progress, data = row if row else ("QUEUED", 0, "{}")
+            info = json.loads(data)
+            status = fields.pop("status", status)
+            progress = int(fields.pop("progress", progress))
+            info.update(fields)
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, progress = ?, data = ?, updated = ? WHERE job_id = ?",
+                    (status, progress, json.dumps(info), now, job_id),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, status, progress, data, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, status, progress, json.dumps(info), now, now),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {**info, "status": status, "progress": progress}
+
+    def recover(self, jobs_dir: Path = JOBS_DIR) -> dict:
+        """JOBS_DIR 스캔으로 누락된 DONE 작업 복구 + 오래 멈춘 작업 ERROR 처리."""
+        conn = self._conn()
+        restored = 0
+        if jobs_dir.exists():
+            known = {r[0] for r in conn.execute("SELECT job_id FROM jobs")}
+            for d in jobs_dir.iterdir():
+                if not d.is_dir() or d.name in known:
+                    continue
+                # 생성 결과 MIDI 하나(<장르>_<태그>.mid) 기준, 숨김/임시 파일(.<이름>...)은 제외.
+                # xml/wav 는 같은 stem 으로 정해진다(xml 은 없으면 첫 다운로드 때 <stem>.parts.json 으로 생성)
+                midi = next((p for p in sorted(d.glob("*.mid")) if not p.name.startswith(".")), None)
+                if midi is None:
+                    continue
+                self.update(
+                    d.name, status="DONE", progress=100,
+                    midi_path=str(midi),
+                    xml_path=str(midi.with_suffix(".xml")),
+                    wav_path=str(midi.with_suffix(".wav")),
+                )
+                restored += 1
+
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'ERROR', progress = 100, updated = ? "
+            "WHERE status IN ('QUEUED', 'RUNNING') AND updated < ?",
+            (time.time(), time.time() - STALE_AFTER),
+        )
+        return {"restored": restored, "staleFailed": cur.rowcount}
+
+
+_STORE: Optional[JobStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = JobStore()
+        return _STORE
@@ -0,0 +1,76 @@
+# app/core/lazy_musicxml.py
+"""
+MusicXML 지연 생성(첫 /musicxml 요청 때).
+
+- make_track 은 MIDI 와 parts_data(<이름>.parts.json)만 남긴다
+- ensure_musicxml: 파일이 있으면 그대로, 없으면 parts_data 로 music21 빌드
+- single-flight: 같은 경로의 동시 요청은 프로세스 안에서는 경로별 Lock, 워커 간에는 flock 으로
+  한 번만 빌드하고 나머지는 결과 파일을 공유
+- 임시 파일(.<이름>.<pid>.part)에 쓴 뒤 os.replace → 읽는 쪽이 반쯤 쓰인 XML 을 보지 않음
+- flock 용 lock 파일(.<이름>.lock)은 놓기 전에 지워 작업 폴더에 남지 않음
+"""
+from __future__ import annotations
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from SongMaker.ai_song_maker.direct_midi import build_musicxml, parts_path_for
+
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _path_lock(path: Path) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(str(path), threading.Lock())
+
+
+@contextmanager
+def _path_flock(path: Path):
+    """워커 간 경로별 배타 잠금(render_cache._key_flock 과 같은 방식: 놓기 전에 lock 파일 삭제)."""
+    while True:
+        lf = open(path, "a")
+        fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            same = os.fstat(lf.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            same = False
+        if same:
+            break
+        lf.close()                 # 기다리는 동안 앞선 보유자가 파일을 지움 → 새 파일로 다시 시도
+    try:
+        yield
+    finally:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        lf.close()                 # 닫으면서 flock 해제
+
+
+def ensure_musicxml(xml_path: Path, parts_path: Optional[Path] = None) -> Optional[Path]:
+    """xml_path 를 보장한다. 만들 재료(parts_data)도 없으면 None."""
+    xml_path = Path(xml_path)
+    if xml_path.exists():
+        return xml_path
+    parts_path = Path(parts_path or parts_path_for(str(xml_path)))
+    if parts_path.suffix != ".json" or not parts_path.exists():   # 예전 .parts.pkl 은 읽지 않음
+        return None
+
+    with _path_lock(xml_path):
+        if xml_path.exists():              # 앞선 요청이 방금 만듦
+            return xml_path
+        with _path_flock(xml_path.with_name(f".{xml_path.name}.lock")):   # 다른 워커 프로세스와 직렬화
+            if not xml_path.exists():
+                tmp = xml_path.with_name(f".{xml_path.name}.{os.getpid()}.part")
+                try:
+                    build_musicxml(str(parts_path), str(tmp))
+                    os.replace(tmp, xml_path)
+                finally:
+                    tmp.unlink(missing_ok=True)
+    with _LOCKS_GUARD:
+        _LOCKS.pop(str(xml_path), None)    # 빌드 완료 후에는 파일 존재 확인만으로 충분
+    return xml_path
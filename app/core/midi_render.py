@@ -1,22 +1,287 @@
 # app/core/midi_render.py
+"""
+MIDI → PCM/WAV 렌더.
+
+- 기본: 워커 프로세스마다 상주하는 내장 신스 풀(pyfluidsynth). SF2 는 신스마다 한 번만 로드하고
+  렌더는 메모리에서 PCM 으로 진행 → 요청마다 fluidsynth 프로세스 + SF2 재로딩 비용 없음
+- 풀 크기(CBB_RENDER_CONCURRENCY, 기본 CPU 코어 수)가 동시 렌더 상한, 렌더당 CBB_RENDER_TIMEOUT 초 초과 시 TimeoutError
+- cancel(threading.Event)이 set 되면 청크/폴링 단위로 중단하고 RenderCancelled(CLI 는 프로세스 kill)
+- pyfluidsynth/libfluidsynth 가 없거나 내장 렌더가 실패하면 fluidsynth CLI 로 폴백
+"""
 from pathlib import Path
-import os, subprocess
+from typing import Dict, Iterator, Optional, Union
+import os, queue, shutil, struct, subprocess, threading, time, wave
+
+from mido import MidiFile
+
+try:
+    import fluidsynth  # pyfluidsynth (libfluidsynth 필요)
+except (ImportError, OSError):
+    fluidsynth = None
 
 # .env 혹은 환경변수로 오버라이드 가능
 DEFAULT_SF2 = Path(__file__).resolve().parents[1] / "assets" / "sf2" / "GeneralUserGS.sf2"
 SF2_PATH = Path(os.environ.get("CBB_SF2", str(DEFAULT_SF2)))
 
-def render_wav_with_fluidsynth(midi_path: Path, out_path: Path, sample_rate: int = 48000) -> Path:
-    if not midi_path.exists():
-        raise FileNotFoundError(f"MIDI not found: {midi_path}")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
-        "fluidsynth", "-ni",
-        "-F", str(out_path),
-        "-r", str(sample_rate),
-        str(SF2_PATH),
-        str(midi_path),
+RENDER_BACKEND = os.environ.get("CBB_RENDER_BACKEND", "auto")   # auto | embedded | cli
+RENDER_CONCURRENCY = int(os.environ.get("CBB_RENDER_CONCURRENCY", str(os.cpu_count() or 1)))
+RENDER_TIMEOUT = float(os.environ.get("CBB_RENDER_TIMEOUT", "120"))
+CHUNK_FRAMES = 4096
+CHANNELS, SAMPLE_WIDTH = 2, 2      # s16 스테레오
+
+
+class RenderCancelled(RuntimeError):
+    """요청한 쪽이 사라져(클라이언트 연결 끊김 등) 렌더를 중단함."""
+
+
+def find_sf2() -> Optional[Path]:
+    """
+    우선순위: 환경변수(CBB_SF2 → CBB_SOUNDFONT_PATH → SF2_PATH) → 프로젝트 자산 → 시스템 기본 경로
+    """
+    env_candidates = [
+        os.environ.get("CBB_SF2"),
+        os.environ.get("CBB_SOUNDFONT_PATH"),
+        os.environ.get("SF2_PATH"),
     ]
-    # 실패 시 에러 메시지 보려고 stdout/stderr 캡처
-    p = subprocess.run(cmd, check=True, capture_output=True, text=True)
-    return out_path
\ No newline at end of file
+    file_candidates = [
+        DEFAULT_SF2,
+        Path("/opt/homebrew/share/soundfonts/FluidR3_GM.sf2"),
+        Path("/usr/share/sounds/sf2/FluidR3_GM.sf2"),
+    ]
+    for c in [*env_candidates, *file_candidates]:
+        if not c:
+            continue
+        p = Path(c)
+        if p.exists():
+            return p
+    return None
+
+
+class _SynthPool:
+    """같은 샘플레이트의 신스 인스턴스 풀. 신스 하나는 한 번에 한 렌더만 사용."""
+
+    def __init__(self, sf2: Path, sample_rate: int, size: int):
+        self.sf2 = sf2
+        self.sample_rate = sample_rate
+        self.size = max(1, size)
+        self._idle: "queue.Queue" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_synth(self):
+        synth = fluidsynth.Synth(samplerate=float(self.sample_rate))
+        sfid = synth.sfload(str(self.sf2))
+        if sfid == -1:
+            synth.delete()
+            raise RuntimeError(f"SF2 로딩 실패: {self.sf2}")
+        synth.cbb_sfid = sfid
+        self._select_programs(synth)
+        return synth
+
+    @staticmethod
+    def _select_programs(synth) -> None:
+        # 채널별 기본 프리셋(10번 채널은 드럼 뱅크)
+        for ch in range(16):
+            synth.program_select(ch, synth.cbb_sfid, 128 if ch == 9 else 0, 0)
+
+    def acquire(self, timeout: float):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._new_synth()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"render slot wait timeout ({timeout:.0f}s)")
+
+    def release(self, synth) -> None:
+        synth.system_reset()            # 남은 음/컨트롤러 초기화 후 재사용
+        self._select_programs(synth)
+        self._idle.put(synth)
+
+    def stats(self) -> dict:
+        return {"size": self.size, "created": self._created, "idle": self._idle.qsize()}
+
+
+class RenderService:
+    def __init__(self, sf2: Optional[Path] = None, concurrency: int = RENDER_CONCURRENCY,
+                 timeout: float = RENDER_TIMEOUT):
+        self.sf2 = sf2 or find_sf2() or SF2_PATH
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = float(timeout)
+        self._pools: Dict[int, _SynthPool] = {}
+        self._lock = threading.Lock()
+        self.embedded_renders = 0
+        self.cli_renders = 0
+        self.fallbacks = 0
+
+    @property
+    def embedded(self) -> bool:
+        return fluidsynth is not None and RENDER_BACKEND != "cli"
+
+    def _pool(self, sample_rate: int) -> _SynthPool:
+        with self._lock:
+            pool = self._pools.get(sample_rate)
+            if pool is None:
+                pool = self._pools[sample_rate] = _SynthPool(self.sf2, sample_rate, self.concurrency)
+            return pool
+
+    @staticmethod
+    def pcm_frames(mid: MidiFile, sample_rate: int) -> int:
+        """iter_pcm 이 만들 전체 프레임 수(마지막 이벤트 시각까지). WAV 헤더를 미리 쓸 때 사용."""
+        t_abs = 0.0
+        for msg in mid:
+            t_abs += msg.time
+        return int(round(t_abs * sample_rate))
+
+    def iter_pcm(self, midi: Union[Path, MidiFile], sample_rate: int = 48000,
+                 chunk_frames: int = CHUNK_FRAMES,
+                 cancel: Optional[threading.Event] = None) -> Iterator[bytes]:
+        """내장 신스로 s16 스테레오 interleaved PCM 청크를 순서대로 생성."""
+        mid = midi if isinstance(midi, MidiFile) else MidiFile(str(midi))
+        deadline = time.monotonic() + self.timeout
+        pool = self._pool(sample_rate)
+        synth = pool.acquire(timeout=self.timeout)
+        try:
+            rendered = 0
+            t_abs = 0.0
+            for msg in mid:                      # 템포 반영된 초 단위 delta
+                t_abs += msg.time
+                target = int(round(t_abs * sample_rate))
+                while rendered < target:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"render timeout ({self.timeout:.0f}s)")
+                    if cancel is not None and cancel.is_set():
+                        raise RenderCancelled("render cancelled")
+                    n = min(chunk_frames, target - rendered)
+                    yield synth.get_samples(n).tobytes()
+                    rendered += n
+                if msg.is_meta:
+                    continue
+                kind = msg.type
+                if kind == "note_on":
+                    synth.noteon(msg.channel, msg.note, msg.velocity)
+                elif kind == "note_off":
+                    synth.noteoff(msg.channel, msg.note)
+                elif kind == "control_change":
+                    synth.cc(msg.channel, msg.control, msg.value)
+                elif kind == "program_change":
+                    synth.program_change(msg.channel, msg.program)
+                elif kind == "pitchwheel":
+                    synth.pitch_bend(msg.channel, msg.pitch)
+            self.embedded_renders += 1
+        finally:
+            pool.release(synth)
+
+    def render_wav(self, midi_path: Path, out_path: Path, sample_rate: int = 48000,
+                   cancel: Optional[threading.Event] = None) -> Path:
+        if not midi_path.exists():
+            raise FileNotFoundError(f"MIDI not found: {midi_path}")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.embedded:
+            tmp = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+            try:
+                with wave.open(str(tmp), "wb") as wf:
+                    wf.setnchannels(CHANNELS)
+                    wf.setsampwidth(SAMPLE_WIDTH)
+                    wf.setframerate(sample_rate)
+                    for chunk in self.iter_pcm(midi_path, sample_rate, cancel=cancel):
+                        wf.writeframesraw(chunk)
+                os.replace(tmp, out_path)
+                return out_path
+            except (TimeoutError, RenderCancelled):
+                raise
+            except Exception as e:
+                if RENDER_BACKEND == "embedded" or not shutil.which("fluidsynth"):
+                    raise
+                self.fallbacks += 1
+                print(f"⚠️  내장 렌더 실패 → fluidsynth CLI 폴백: {e}")
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+        return self._render_cli(midi_path, out_path, sample_rate, cancel)
+
+    def _render_cli(self, midi_path: Path, out_path: Path, sample_rate: int,
+                    cancel: Optional[threading.Event] = None) -> Path:
+        cmd = [
+            "fluidsynth", "-ni",
+            "-F", str(out_path),
+            "-r", str(sample_rate),
+            str(self.sf2),
+            str(midi_path),
+        ]
+        # 실패 시 에러 메시지 보려고 stdout/stderr 캡처, 타임아웃/취소 시 프로세스 종료
+        deadline = time.monotonic() + self.timeout
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        while True:
+            try:
+                out, err = proc.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                cancelled = cancel is not None and cancel.is_set()
+                if cancelled or time.monotonic() > deadline:
+                    proc.kill()
+                    proc.communicate()
+                    if cancelled:
+                        raise RenderCancelled("render cancelled")
+                    raise subprocess.TimeoutExpired(cmd, self.timeout)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, out, err)
+        self.cli_renders += 1
+        return out_path
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = {str(sr): p.stats() for sr, p in self._pools.items()}
+        return {
+            "backend": "embedded" if self.embedded else "cli",
+            "sf2": str(self.sf2),
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            "pools": pools,
+            "embeddedRenders": self.embedded_renders,
+            "cliRenders": self.cli_renders,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def wav_header(frames: int, sample_rate: int) -> bytes:
+    """PCM WAV(RIFF) 44바이트 헤더. 길이를 미리 알 때 스트리밍 앞에 바로 보낸다."""
+    data_bytes = frames * CHANNELS * SAMPLE_WIDTH
+    block_align = CHANNELS * SAMPLE_WIDTH
+    return (
+        b"RIFF" + struct.pack("<L", 36 + data_bytes) + b"WAVE"
+        + b"fmt " + struct.pack("<LHHLLHH", 16, 1, CHANNELS, sample_rate,
+                                sample_rate * block_align, block_align, SAMPLE_WIDTH * 8)
+        + b"data" + struct.pack("<L", data_bytes)
+    )
+
+
+_SERVICE: Optional[RenderService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_render_service() -> RenderService:
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = RenderService()
+        return _SERVICE
+
+
+def render_status() -> dict:
+    return _SERVICE.stats() if _SERVICE is not None else {"backend": "embedded" if fluidsynth else "cli"}
+
+
+def render_wav_with_fluidsynth(midi_path: Path, out_path: Path, sample_rate: int = 48000,
+                               cancel: Optional[threading.Event] = None) -> Path:
+    return get_render_service().render_wav(Path(midi_path), Path(out_path), sample_rate=sample_rate,
+                                           cancel=cancel)
@@ -0,0 +1,94 @@
+# app/core/midi_stream.py
+"""
+메시지 리스트를 복사하지 않고 MIDI 바이트 스트림으로 직접 직렬화.
+
+- encode_events: mido.MidiFile.save 와 같은 규칙(running status, meta/sysex 처리)으로 트랙 본문 인코딩
+- LoopTrack: '본문 × repeats' 구간 표현. 본문은 첫 회/반복 회(직전 running status 반영) 두 벌만 인코딩하고
+  저장 시 같은 바이트를 repeats 번 write → 메시지 객체를 N 배로 늘리지 않음
+- write_midi_file: MThd + 각 트랙 MTrk 청크를 파일에 순서대로 기록
+"""
+from __future__ import annotations
+import struct
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from mido import MetaMessage, MidiTrack
+from mido.midifiles.midifiles import encode_variable_int
+
+_EOT_META = bytes(MetaMessage("end_of_track").bytes())
+
+
+def encode_events(msgs: Iterable, running_status: Optional[int] = None) -> Tuple[bytearray, Optional[int]]:
+    """delta time + 메시지 바이트. end_of_track 은 호출 측이 붙인다. (데이터, 끝의 running status) 반환."""
+    data = bytearray()
+    for msg in msgs:
+        if msg.time < 0 or int(msg.time) != msg.time:
+            raise ValueError("message time must be a non-negative int in MIDI file")
+        data.extend(encode_variable_int(int(msg.time)))
+        if msg.is_meta:
+            data.extend(msg.bytes())
+            running_status = None
+        elif msg.type == "sysex":
+            data.append(0xF0)
+            data.extend(encode_variable_int(len(msg.data) + 1))
+            data.extend(msg.data)
+            data.append(0xF7)
+            running_status = None
+        else:
+            raw = msg.bytes()
+            status = raw[0]
+            data.extend(raw[1:] if status == running_status else raw)
+            running_status = status if status < 0xF0 else None
+    return data, running_status
+
+
+class LoopTrack:
+    """
+    body 를 repeats 회 이어붙인 트랙(+ end_delta 뒤 end_of_track).
+    반복 회차의 첫 메시지는 직전 회차 끝의 running status 를 이어받으므로 별도 인코딩.
+    (회차 끝 상태는 마지막 메시지로만 결정 → 두 번째 이후 회차는 모두 같은 바이트)
+    """
+
+    def __init__(self, body: Sequence, repeats: int = 1, end_delta: int = 0):
+        self.body = body
+        self.repeats = max(1, int(repeats))
+        self.head, end_status = encode_events(body)
+        self.tail = self.head if self.repeats == 1 else encode_events(body, end_status)[0]
+        self.eot = bytes(encode_variable_int(int(end_delta))) + _EOT_META
+
+    def __len__(self) -> int:
+        return len(self.head) + len(self.tail) * (self.repeats - 1) + len(self.eot)
+
+    def write(self, f) -> None:
+        f.write(b"MTrk")
+        f.write(struct.pack(">L", len(self)))
+        f.write(self.head)
+        for _ in range(self.repeats - 1):
+            f.write(self.tail)
+        f.write(self.eot)
+
+
+def _from_track(track: Union[MidiTrack, list]) -> LoopTrack:
+    """mido.fix_end_of_track 과 동일: 중간 end_of_track 의 delta 는 다음 메시지(또는 마지막 EOT)로 넘김."""
+    body, accum = [], 0
+    for msg in track:
+        if msg.type == "end_of_track":
+            accum += msg.time
+        elif accum:
+            body.append(msg.copy(time=msg.time + accum))
+            accum = 0
+        else:
+            body.append(msg)
+    return LoopTrack(body, end_delta=accum)
+
+
+def write_midi_file(path: Path, tracks: List[Union[LoopTrack, MidiTrack, list]],
+                    ticks_per_beat: int, midi_type: int = 1) -> None:
+    """트랙 리스트(LoopTrack 또는 일반 메시지 리스트)를 SMF 로 저장."""
+    loops = [t if isinstance(t, LoopTrack) else _from_track(t) for t in tracks]
+    with open(path, "wb") as f:
+        f.write(b"MThd")
+        f.write(struct.pack(">L", 6))
+        f.write(struct.pack(">hhh", midi_type, len(loops), ticks_per_beat))
+        for lt in loops:
+            lt.write(f)
@@ -1,6 +1,7 @@
 # app/core/pipeline_generate.py
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
+import os
 import uuid
 
 from SongMaker.useSongMaker_rock import generate_rock_track
@@ -8,7 +9,13 @@ from SongMaker.useSongMaker_jazz import generate_jazz_track
 from SongMaker.useSongMaker_pop  import generate_pop_track
 
 from mido import MidiFile, MidiTrack, MetaMessage
-from .chord_markers import inject_chord_markers
+from .chord_markers import build_chord_marker_track
+from .midi_stream import LoopTrack, write_midi_file
+from . import gen_cache
+
+# 1 이면 생성 시 MusicXML 도 즉시 작성(music21), 기본은 MIDI 만 직접 쓰고 MusicXML 은 첫 다운로드 때 생성
+EAGER_MUSICXML = os.environ.get("CBB_EAGER_MUSICXML", "0") == "1"
+PARTS_SUFFIX = ".parts.json"
 
 # ===== 내부 유틸: 트리밍/반복 =====
 def _last_sound_tick(track: MidiTrack) -> int:
@@ -32,76 +39,123 @@ def _slice_track_upto(track: MidiTrack, end_tick: int) -> MidiTrack:
             acc = nxt
             continue
         if nxt <= end_tick:
-            out.append(msg.copy())
+            out.append(msg)   # 원본 MidiFile 은 후처리 후 버리므로 복사 없이 참조
             acc = nxt
         else:
             break
     out.append(MetaMessage("end_of_track", time=0))
     return out
 
-def _repeat_tracks(mid: MidiFile, repeats: int) -> MidiFile:
-    out = MidiFile(type=mid.type, ticks_per_beat=mid.ticks_per_beat)
+def _loop_tracks(mid: MidiFile, repeats: int) -> List[LoopTrack]:
+    """
+    트랙별로 실제 소리 구간까지 자른 본문을 repeats 회 반복하는 LoopTrack 으로 변환.
+    메시지를 N 벌 복사하지 않고, 저장 시 인코딩된 본문 바이트를 반복 기록한다.
+    """
     repeats = max(1, int(repeats))
+    out: List[LoopTrack] = []
 
     for tr in mid.tracks:
         end_tick = _last_sound_tick(tr)
 
         if end_tick <= 0:
-            base = MidiTrack()
+            base = []
             acc = 0
             for msg in tr:
                 acc += msg.time
                 if acc == 0 and msg.is_meta and msg.type != "end_of_track":
-                    base.append(msg.copy())
-            base.append(MetaMessage("end_of_track", time=0))
-            out.tracks.append(base)
+                    base.append(msg)
+            out.append(LoopTrack(base))
             continue
 
         chunk = _slice_track_upto(tr, end_tick)
-        rep = MidiTrack()
-        for msg in chunk:
-            if msg.type != "end_of_track":
-                rep.append(msg.copy())
-        for _ in range(repeats - 1):
-            for msg in chunk:
-                if msg.type != "end_of_track":
-                    rep.append(msg.copy())
-        rep.append(MetaMessage("end_of_track", time=0))
-        out.tracks.append(rep)
+        body = [msg for msg in chunk if msg.type != "end_of_track"]
+        out.append(LoopTrack(body, repeats=repeats))
 
     return out
 
-def _postprocess_midi_repeat_and_trim(midi_path: Path, repeats: int) -> None:
-    mid = MidiFile(str(midi_path))
-    processed = _repeat_tracks(mid, repeats=max(1, int(repeats)))
-    processed.save(str(midi_path))
-
-def _read_first_time_signature(midi_path: Path) -> Tuple[int, int]:
-    mid = MidiFile(str(midi_path))
-    for tr in mid.tracks:
-        acc = 0
+def _first_time_signature(tracks) -> Tuple[int, int]:
+    for tr in tracks:
         for msg in tr:
-            acc += msg.time
             if msg.is_meta and msg.type == "time_signature":
                 return (msg.numerator, msg.denominator)
     return (4, 4)
 
+def _postprocess_midi(midi_path: Path, progression, repeats: int, bars_per_chord: int,
+                      mid: Optional[MidiFile] = None) -> None:
+    """
+    한 번만 쓰는 후처리: 트리밍+반복 → 박자 확인 → 코드 마커 트랙 추가 → midi_path 저장.
+    mid(생성기의 메모리 MidiFile)가 있으면 파일을 다시 읽지 않는다.
+    단계별 실패는 기존처럼 건너뛴다(반복 실패 시 원본 트랙 그대로).
+    """
+    if mid is None:
+        mid = MidiFile(str(midi_path))
+
+    # 1~2) 트리밍 + 반복(루프 구간 표현)
+    try:
+        tracks = _loop_tracks(mid, repeats=repeats)
+        time_sig = _first_time_signature(t.body for t in tracks)
+    except Exception:
+        tracks = list(mid.tracks)
+        time_sig = _first_time_signature(tracks)
+
+    # 3) 코드 마커 삽입(항상 '마지막' 트랙)
+    try:
+        tracks.append(build_chord_marker_track(
+            mid.ticks_per_beat, progression, time_sig,
+            repeat=repeats, bars_per_chord=bars_per_chord, track_name="Chord Markers",
+        ))
+    except Exception:
+        pass
+
+    write_midi_file(midi_path, tracks, ticks_per_beat=mid.ticks_per_beat, midi_type=mid.type)
+
 # ===== 공개 엔트리포인트 =====
-def make_track(genre, progression, tempo, options, outdir):
+def make_track(genre, progression, tempo, options, outdir, job_id=None, on_progress=None):
     """
     1) SongMaker로 기본 트랙 생성
     2) 실제 소리구간 기준으로 트리밍 후 repeats회 반복
     3) 코드 마커(현재/다음 코드 HUD용) 삽입
+    on_progress(pct): 단계별 진행률(0~100) 콜백(작업 큐에서 사용)
+    options["seed"] 가 있으면 결과를 gen_cache 에 저장/재사용(같은 입력 → 생성 생략)
+    MusicXML 은 기본적으로 만들지 않고 parts_data(<이름>.parts.json)만 남김 → xml_path 는 나중에 생성될 경로
     """
+    def progress(pct):
+        if on_progress is not None:
+            try:
+                on_progress(pct)
+            except Exception:
+                pass
+
     outdir.mkdir(parents=True, exist_ok=True)
-    job_id = uuid.uuid4().hex[:8]
+    job_id = job_id or uuid.uuid4().hex[:8]
     job_dir = outdir / job_id
     job_dir.mkdir(parents=True, exist_ok=True)
 
     opts = options or {}
     repeats = int(opts.get("repeats", 6))
     bars_per_chord = int(opts.get("bars_per_chord", 1))
-
+    seed = opts.get("seed")
+    seed = int(seed) if seed is not None else None
+
+    cache_key = gen_cache.cache_key(genre, progression, tempo, opts, repeats, bars_per_chord, seed)
+    if cache_key:
+        try:
+            cached = gen_cache.restore(cache_key, job_dir)
+        except Exception as e:
+            print(f"⚠️  gen cache 조회 실패: {e}")
+            cached = None
+        if cached:
+            midi = next((p for n, p in cached.items() if n.endswith(".mid")), None)
+            xml = next((p for n, p in cached.items() if n.endswith(".xml")), None)
+            parts = next((p for n, p in cached.items() if n.endswith(PARTS_SUFFIX)), None)
+            if xml is None and parts is not None:
+                xml = parts[:-len(PARTS_SUFFIX)] + ".xml"
+            if midi and xml:
+                progress(100)
+                return {"job_id": job_id, "midi_path": midi, "xml_path": xml,
+                        "parts_path": parts, "cache_key": cache_key}
+
+    progress(10)
     if genre == "rock":
         result = generate_rock_track(
             progression=progression, tempo=tempo,
@@ -112,6 +166,9 @@ def make_track(genre, progression, tempo, options, outdir):
             point_inst=opts.get("point_inst","none"),
             point_density=opts.get("point_density","light"),
             point_key=opts.get("point_key","C"),
+            seed=seed,
+            musicxml=EAGER_MUSICXML,
+            save_midi=False,
             out_dir=str(job_dir),
         )
     elif genre == "jazz":
@@ -122,6 +179,9 @@ def make_track(genre, progression, tempo, options, outdir):
             point_inst=opts.get("point_inst","none"),
             point_density=opts.get("point_density","light"),
             point_key=opts.get("point_key","C"),
+            seed=seed,
+            musicxml=EAGER_MUSICXML,
+            save_midi=False,
             out_dir=str(job_dir),
         )
     elif genre == "pop":
@@ -133,36 +193,39 @@ def make_track(genre, progression, tempo, options, outdir):
             point_inst=opts.get("point_inst","none"),
             point_density=opts.get("point_density","light"),
             point_key=opts.get("point_key","C"),
+            seed=seed,
+            musicxml=EAGER_MUSICXML,
+            save_midi=False,
             out_dir=str(job_dir),
         )
     else:
         raise ValueError(f"지원되지 않는 장르: {genre}")
 
     midi_path = Path(result["midi_path"])
+    progress(70)
 
-    # 1~2) 트리밍 + 반복
+    # 트리밍/반복/코드 마커: 생성기의 메모리 MidiFile 을 받아 여기서 한 번만 저장
     try:
-        _postprocess_midi_repeat_and_trim(midi_path, repeats=repeats)
+        _postprocess_midi(midi_path, progression, repeats=repeats, bars_per_chord=bars_per_chord,
+                          mid=result["midi"])
     except Exception:
-        pass
-
-    # 3) 코드 마커 삽입(항상 '마지막' 단계)
-    try:
-        time_sig = _read_first_time_signature(midi_path)
-        inject_chord_markers(
-            midi_path=str(midi_path),
-            progression=progression,
-            tempo_bpm=float(tempo),
-            time_sig=time_sig,
-            repeat=repeats,
-            bars_per_chord=bars_per_chord,
-            track_name="Chord Markers",
-        )
-    except Exception:
-        pass
+        if not midi_path.exists():
+            result["midi"].save(str(midi_path))
+    progress(85)
+
+    if cache_key:
+        try:
+            artifacts = [midi_path, Path(result["musicxml_path"])]
+            if result.get("parts_path"):
+                artifacts.append(Path(result["parts_path"]))
+            gen_cache.store(cache_key, artifacts)
+        except Exception as e:
+            print(f"⚠️  gen cache 저장 실패: {e}")
 
     return {
         "job_id": job_id,
         "midi_path": str(midi_path),
         "xml_path": result["musicxml_path"],
+        "parts_path": result.get("parts_path"),   # MusicXML 지연 생성 재료(EAGER 면 None)
+        "cache_key": cache_key,
     }
\ No newline at end of file
@@ -2,8 +2,12 @@
 from __future__ import annotations
 import threading
 import re
-import os, sys
-from typing import List, Tuple
+import os, sys, time
+import copy
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from typing import List, Tuple, Optional
 
 # ---- 경로 보정 (LSTM 패키지 접근) ----
 HERE = os.path.dirname(os.path.abspath(__file__))
@@ -11,18 +15,44 @@ PROJ_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
 if PROJ_ROOT not in sys.path:
     sys.path.insert(0, PROJ_ROOT)
 
+import torch
+
 from LSTM.predict_next_chord import (
+    BASE_DIRS,
     load_model_and_vocab,
     mmr_select,
     bucketize_three_dynamic as bucketize_three,  # ← 새 함수로 매핑
 )
 
 from LSTM.chord_engine.smart_progression import generate_topk
-from LSTM.harmony_score import evaluate_progression, interpret_score
+from LSTM.chord_engine.beam_search import beam_search_progressions
+from LSTM.harmony_score import (
+    PrefixStateTrie,
+    evaluate_progressions_batch,
+    evaluate_progressions_incremental,
+    interpret_score,
+)
+from .predict_table import lookup_prediction
 
-# 멀티 요청 대비 모델 캐시
+# 멀티 요청 대비 모델 캐시 (장르별 락: 서로 다른 장르 로딩이 서로를 막지 않음)
 _MODEL_CACHE = {}
-_MODEL_LOCK = threading.Lock()
+_MODEL_LOCKS = {g: threading.Lock() for g in BASE_DIRS}
+_MODEL_LOCKS_GUARD = threading.Lock()
+_MODEL_STATUS: dict = {}  # genre → {"ready", "hasModel", "loadSec"}
+
+# LSTM 채점 방식: batch(윈도우 일괄) | window(트라이 캐시, batch와 동일 확률) | stream(상태 연속)
+SCORER_MODE = os.environ.get("CBB_SCORER_MODE", "batch").lower()
+# window/stream 채점의 prefix 트라이는 장르(모델)별로 요청 간 공유, 노드 수가 상한을 넘으면 새 트라이로 교체
+PREFIX_TRIE_MAX = int(os.environ.get("CBB_PREFIX_TRIE_MAX", "20000"))
+_TRIES: dict = {}  # genre → (model, PrefixStateTrie, Lock)
+_TRIES_GUARD = threading.Lock()
+
+# 후보 생성: rules(템플릿만) | beam(템플릿 + LSTM 빔 서치)
+GEN_MODE = os.environ.get("CBB_GEN_MODE", "rules").lower()
+BEAM_WIDTH = int(os.environ.get("CBB_BEAM_WIDTH", "32"))
+BEAM_LENGTH = int(os.environ.get("CBB_BEAM_LENGTH", "8"))
+BEAM_PRIOR = float(os.environ.get("CBB_BEAM_PRIOR", "0.5"))
+CANDIDATE_POOL = int(os.environ.get("CBB_CANDIDATE_POOL", "64"))
 
 ROOT_RE = re.compile(r"^([A-G](?:#|b)?)")
 
@@ -37,14 +67,58 @@ def _to_roots(tokens: List[str]) -> List[str]:
         roots.append(m.group(1) if m else t)
     return roots[:3]
 
+def _genre_lock(genre: str) -> threading.Lock:
+    lock = _MODEL_LOCKS.get(genre)
+    if lock is None:
+        with _MODEL_LOCKS_GUARD:
+            lock = _MODEL_LOCKS.setdefault(genre, threading.Lock())
+    return lock
+
+def _prefix_trie(genre: str, model):
+    """장르의 공유 트라이와 그 잠금. 모델이 다시 로드됐거나 크기 상한을 넘었으면 새로 만든다."""
+    with _TRIES_GUARD:
+        entry = _TRIES.get(genre)
+        if entry is None or entry[0] is not model or entry[1].size > PREFIX_TRIE_MAX:
+            entry = _TRIES[genre] = (model, PrefixStateTrie(), threading.Lock())
+        return entry[1], entry[2]
+
+def _warmup_model(model) -> None:
+    """더미 forward 1회(커널/할당기 워밍업)."""
+    with torch.no_grad():
+        model(torch.zeros((1, 3), dtype=torch.long))
+
 def get_model_assets(genre: str):
     """모델/사전 캐시 로드."""
-    with _MODEL_LOCK:
+    cached = _MODEL_CACHE.get(genre)
+    if cached is not None:
+        return cached
+    with _genre_lock(genre):
         if genre not in _MODEL_CACHE:
+            t0 = time.perf_counter()
             model, chord_to_index, index_to_chord = load_model_and_vocab(genre)
+            if model is not None:
+                try:
+                    _warmup_model(model)
+                except Exception as e:
+                    print(f"⚠️  [{genre}] 워밍업 실패: {e}")
             _MODEL_CACHE[genre] = (model, chord_to_index, index_to_chord)
+            _MODEL_STATUS[genre] = {
+                "ready": True,
+                "hasModel": model is not None,
+                "loadSec": round(time.perf_counter() - t0, 3),
+            }
         return _MODEL_CACHE[genre]
 
+def load_all_models(genres: Optional[List[str]] = None) -> dict:
+    """모든 장르 모델을 병렬로 로드+워밍업(서버 시작 시 호출)."""
+    genres = genres or list(BASE_DIRS.keys())
+    with ThreadPoolExecutor(max_workers=len(genres), thread_name_prefix="model-load") as ex:
+        list(ex.map(get_model_assets, genres))
+    return model_status()
+
+def model_status() -> dict:
+    return {g: dict(_MODEL_STATUS.get(g, {"ready": False})) for g in BASE_DIRS}
+
 def predict_top_k(genre: str, seed: List[str], k: int = 3):
     seed_roots = _to_roots(seed)
 
@@ -61,10 +135,25 @@ def predict_top_k(genre: str, seed: List[str], k: int = 3):
 
     blended: List[Tuple[List[str], float]] = []
     if use_model:
-        def scorer_fn(seq: List[str]) -> float:
-            return float(evaluate_progression(model, seq, c2i, i2c))
+        def batch_scorer_fn(seqs: List[List[str]]) -> List[float]:
+            if SCORER_MODE in ("window", "stream"):
+                trie, lock = _prefix_trie(genre, model)
+                with lock:   # ensure() 가 트라이를 확장하므로 같은 장르는 순서대로
+                    return evaluate_progressions_incremental(model, seqs, c2i, i2c, mode=SCORER_MODE, trie=trie)
+            return evaluate_progressions_batch(model, seqs, c2i, i2c)
+        extra: List[List[str]] = []
+        if GEN_MODE == "beam":
+            try:
+                beams = beam_search_progressions(
+                    model, c2i, i2c, genre, seed_roots,
+                    beam_width=BEAM_WIDTH, length=BEAM_LENGTH, prior_weight=BEAM_PRIOR,
+                )
+                extra = [seq for seq, _ in beams]
+            except Exception as e:
+                print(f"⚠️  beam search 실패(템플릿만 사용): {e}")
         blended_pool = generate_topk(
-            genre=genre, seed_roots=seed_roots, k=64, scorer=scorer_fn, alpha=0.5
+            genre=genre, seed_roots=seed_roots, k=CANDIDATE_POOL,
+            batch_scorer=batch_scorer_fn, alpha=0.5, extra_cands=extra,
         )
         blended_pool = [(s, sc) for (s, sc) in blended_pool if tuple(s) != tuple(top1_seq)]
         blended = mmr_select(blended_pool, k=max(0, k - 1), lam=0.55, already=[top1_seq], min_diff=3)
@@ -87,4 +176,90 @@ def predict_top_k(genre: str, seed: List[str], k: int = 3):
         score01 = float(shown_pct[i] if i < len(shown_pct) else 50) / 100.0
         results.append({"progression": seq, "score": score01, "label": label})
 
-    return results
\ No newline at end of file
+    return results
+
+# ===== 응답 캐시 (genre, seed roots, k) → predict_top_k 결과 =====
+# predict_top_k 는 같은 장르/루트 시드면 결과가 같다(_to_roots 가 코드 퀄리티를 버리고,
+# 버킷 지터도 시퀀스 해시 기반). 루트 시드는 12^3 × 3장르 뿐이라 전부 캐시 가능.
+PREDICT_CACHE_SIZE = int(os.environ.get("CBB_PREDICT_CACHE_SIZE", "8192"))
+PREDICT_CACHE_TTL = float(os.environ.get("CBB_PREDICT_CACHE_TTL", "3600"))  # 초, 0 이하 = 만료 없음
+
+class _PredictCache:
+    """스레드 안전 LRU + TTL 캐시(히트/미스 카운터 포함)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = float(ttl)
+        self._data: "OrderedDict[tuple, Tuple[float, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[list]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                ts, value = item
+                if self.ttl <= 0 or time.monotonic() - ts < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, value: list) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": (self.hits / total) if total else 0.0,
+            }
+
+_PREDICT_CACHE = _PredictCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL)
+
+def predict_top_k_cached(genre: str, seed: List[str], k: int = 3):
+    """사전계산 테이블(mmap) → LRU → predict_top_k 순으로 조회. 반환값은 캐시와 분리된 복사본."""
+    seed_roots = _to_roots(seed)
+    table_hit = lookup_prediction(genre, seed_roots, k=k)
+    if table_hit is not None:
+        return table_hit
+
+    key = (genre, tuple(seed_roots), int(k))
+    cached = _PREDICT_CACHE.get(key)
+    if cached is None:
+        cached = predict_top_k(genre, seed, k=k)
+        _PREDICT_CACHE.put(key, cached)
+    return copy.deepcopy(cached)
+
+def predict_cache_stats() -> dict:
+    return _PREDICT_CACHE.stats()
+
+# 워밍업용 루트 표기(smart_progression.ABS 와 동일한 12음)
+_WARMUP_ROOTS = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+
+def warmup_predict_cache(genres: Optional[List[str]] = None, k: int = 3) -> int:
+    """모든 루트 시드 조합(12^3)을 장르별로 미리 계산해 캐시에 채운다. 채운 개수 반환."""
+    filled = 0
+    for genre in genres or ["rock", "jazz", "pop"]:
+        for seed in product(_WARMUP_ROOTS, repeat=3):
+            try:
+                predict_top_k_cached(genre, list(seed), k=k)
+                filled += 1
+            except Exception as e:
+                print(f"⚠️  predict warm-up 실패({genre} {seed}): {e}")
+                continue   # 한 시드 실패로 나머지 루트를 비워두지 않음
+    return filled
@@ -0,0 +1,263 @@
+# app/core/predict_table.py
+"""
+루트 시드 전체(12^3) × 장르에 대한 predict_top_k 결과를 미리 계산해 둔 바이너리 테이블.
+
+- 빌드(오프라인): python -m app.core.predict_table --out app/assets/predict_table.bin
+- 서빙: 시작 시 mmap 으로 열고 (장르, 루트 pitch class 3개) → 레코드 오프셋 O(1) 조회
+- 장르별 해시(chord_lstm.pt + vocab + 추론/후보 생성 설정 + k)가 현재와 다르면 그 장르는 무효 → 라이브 경로 사용
+
+파일 레이아웃(little endian)
+  header   : magic(8s) k(H) max_len(H) n_genres(H) n_tokens(I)
+  genres   : n_genres × [name(16s) digest(32s)]
+  tokens   : (n_tokens+1) × offset(I) + utf-8 blob
+  records  : n_genres × 1728 × [count(B) + k × (len(B) pct(H) ids(max_len × H))]
+"""
+from __future__ import annotations
+import hashlib
+import mmap
+import os, sys
+import struct
+import threading
+from itertools import product
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJ_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+from LSTM.predict_next_chord import BASE_DIRS, LSTM_BACKEND, LSTM_QUANTIZE, TORCHSCRIPT_FILE
+from LSTM.chord_engine.smart_progression import pc_of
+
+MAGIC = b"CBBPT001"
+HEADER = struct.Struct("<8sHHHI")
+GENRE_ENTRY = struct.Struct("<16s32s")
+N_SEEDS = 12 ** 3
+GENRES = ["rock", "jazz", "pop"]
+
+# 체크포인트 해시에 포함되는 모델 산출물(없는 파일은 건너뜀)
+MODEL_ARTIFACTS = ("chord_lstm.pt", TORCHSCRIPT_FILE, "vocab.bin", "chord_to_index.npy", "index_to_chord.npy")
+
+DEFAULT_TABLE_PATH = Path(os.environ.get(
+    "CBB_PREDICT_TABLE",
+    str(Path(HERE).parent / "assets" / "predict_table.bin"),
+))
+
+# 표시용 루트(smart_progression.ABS 와 동일)
+_ROOT_NAMES = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+
+
+def _pipeline_config() -> str:
+    """predict_top_k 결과를 바꾸는 설정(채점 방식, 후보 생성, 추론 백엔드/양자화)."""
+    from .pipeline_predict import (
+        SCORER_MODE, GEN_MODE, BEAM_WIDTH, BEAM_LENGTH, BEAM_PRIOR, CANDIDATE_POOL,
+    )
+    return (f"scorer={SCORER_MODE}|gen={GEN_MODE}|beam={BEAM_WIDTH},{BEAM_LENGTH},{BEAM_PRIOR}"
+            f"|pool={CANDIDATE_POOL}|backend={LSTM_BACKEND}|quantize={int(LSTM_QUANTIZE)}")
+
+
+def model_digest(genre: str, k: int) -> bytes:
+    """
+    장르 모델 디렉토리의 체크포인트/사전 파일 + 파이프라인 설정 + k 의 SHA-256
+    (모델이 없으면 룰 전용 결과로 간주). 버킷팅이 k 에 따라 달라지므로 k 도 포함.
+    """
+    h = hashlib.sha256()
+    h.update(f"{_pipeline_config()}|k={int(k)}".encode("utf-8"))
+    base = BASE_DIRS.get(genre, "")
+    for name in MODEL_ARTIFACTS:
+        p = os.path.join(base, name)
+        if not os.path.exists(p):
+            continue
+        h.update(name.encode("utf-8"))
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.digest()
+
+
+def seed_index(seed_roots: List[str]) -> Optional[int]:
+    """루트 3개 → 0..1727. 알 수 없는 루트가 있으면 None."""
+    if len(seed_roots) != 3:
+        return None
+    pcs = [pc_of(r) for r in seed_roots]
+    if any(p is None for p in pcs):
+        return None
+    return pcs[0] * 144 + pcs[1] * 12 + pcs[2]
+
+
+def _record_struct(k: int, max_len: int) -> struct.Struct:
+    return struct.Struct("<B" + ("BH" + "H" * max_len) * k)
+
+
+# ===== 빌더 =====
+def build_prediction_table(out_path: Path, genres: Optional[List[str]] = None, k: int = 3) -> Path:
+    """모든 루트 시드에 대해 predict_top_k(룰 풀 + LSTM 블렌딩 + MMR + 버킷팅)를 돌려 테이블로 저장."""
+    from .pipeline_predict import predict_top_k
+
+    genres = genres or GENRES
+    results: Dict[str, List[list]] = {}
+    for genre in genres:
+        rows = []
+        for seed in product(_ROOT_NAMES, repeat=3):
+            rows.append(predict_top_k(genre, list(seed), k=k))
+        results[genre] = rows
+        print(f"[{genre}] ✅ {len(rows)} seeds")
+
+    tokens: Dict[str, int] = {}
+    max_len = 0
+    for rows in results.values():
+        for cands in rows:
+            for c in cands:
+                max_len = max(max_len, len(c["progression"]))
+                for ch in c["progression"]:
+                    tokens.setdefault(ch, len(tokens))
+
+    rec = _record_struct(k, max_len)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, k, max_len, len(genres), len(tokens)))
+        for genre in genres:
+            f.write(GENRE_ENTRY.pack(genre.encode("ascii"), model_digest(genre, k)))
+
+        blobs = [t.encode("utf-8") for t in tokens]
+        offsets = [0]
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(blobs))
+
+        for genre in genres:
+            for cands in results[genre]:
+                fields: list = [min(len(cands), k)]
+                for i in range(k):
+                    if i < len(cands):
+                        prog = cands[i]["progression"]
+                        ids = [tokens[ch] for ch in prog] + [0] * (max_len - len(prog))
+                        pct = int(round(float(cands[i]["score"]) * 100))
+                        fields += [len(prog), pct, *ids]
+                    else:
+                        fields += [0, 0] + [0] * max_len
+                f.write(rec.pack(*fields))
+    os.replace(tmp_path, out_path)
+    print(f"✅ prediction table 저장: {out_path} (tokens={len(tokens)}, max_len={max_len})")
+    return out_path
+
+
+# ===== 리더(mmap) =====
+class PredictionTable:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.k, self.max_len, n_genres, n_tokens = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"invalid prediction table: {self.path}")
+        off = HEADER.size
+
+        self.genres: Dict[str, int] = {}
+        self.digests: Dict[str, bytes] = {}
+        for gi in range(n_genres):
+            name, digest = GENRE_ENTRY.unpack_from(self._mm, off)
+            genre = name.rstrip(b"\0").decode("ascii")
+            self.genres[genre] = gi
+            self.digests[genre] = digest
+            off += GENRE_ENTRY.size
+
+        offsets = struct.unpack_from(f"<{n_tokens + 1}I", self._mm, off)
+        off += 4 * (n_tokens + 1)
+        blob = self._mm[off:off + offsets[-1]]
+        self.tokens = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n_tokens)]
+        off += offsets[-1]
+
+        self._rec = _record_struct(self.k, self.max_len)
+        self._records_start = off
+        # 현재 모델/설정과 해시가 같은 장르만 사용
+        self.valid = {g for g in self.genres if self.digests[g] == model_digest(g, self.k)}
+
+    def lookup(self, genre: str, seed_roots: List[str], k: int = 3) -> Optional[list]:
+        if genre not in self.valid or k != self.k:   # 다른 k 는 점수 버킷이 달라 잘라 쓸 수 없음
+            return None
+        si = seed_index(seed_roots)
+        if si is None:
+            return None
+        pos = self._records_start + (self.genres[genre] * N_SEEDS + si) * self._rec.size
+        fields = self._rec.unpack_from(self._mm, pos)
+        count = fields[0]
+        if count == 0:
+            return None
+
+        out = []
+        step = 2 + self.max_len
+        for i in range(count):
+            base = 1 + i * step
+            length, pct = fields[base], fields[base + 1]
+            ids = fields[base + 2:base + 2 + length]
+            out.append({
+                "progression": [self.tokens[t] for t in ids],
+                "score": float(pct) / 100.0,
+                "label": "정석 진행" if i == 0 else "대안 진행",
+            })
+        return out
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
+
+
+_TABLE: Optional[PredictionTable] = None
+_TABLE_LOCK = threading.Lock()
+
+
+def load_prediction_table(path: Optional[Path] = None) -> Optional[PredictionTable]:
+    """테이블을 mmap 으로 연다. 없거나 손상되면 None(라이브 경로 사용)."""
+    global _TABLE
+    path = Path(path or DEFAULT_TABLE_PATH)
+    with _TABLE_LOCK:
+        if _TABLE is not None:
+            _TABLE.close()
+            _TABLE = None
+        if not path.exists():
+            return None
+        try:
+            _TABLE = PredictionTable(path)
+            stale = sorted(set(_TABLE.genres) - _TABLE.valid)
+            if stale:
+                print(f"⚠️  prediction table 모델/설정 해시 불일치(라이브 경로 사용): {stale}")
+        except Exception as e:
+            print(f"⚠️  prediction table 로딩 실패: {e}")
+            _TABLE = None
+        return _TABLE
+
+
+def lookup_prediction(genre: str, seed_roots: List[str], k: int = 3) -> Optional[list]:
+    table = _TABLE
+    if table is None:
+        return None
+    return table.lookup(genre, seed_roots, k=k)
+
+
+def prediction_table_status() -> dict:
+    table = _TABLE
+    if table is None:
+        return {"loaded": False}
+    return {"loaded": True, "path": str(table.path), "genres": sorted(table.valid)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build precomputed chord prediction table")
+    ap.add_argument("--out", type=str, default=str(DEFAULT_TABLE_PATH))
+    ap.add_argument("--genres", type=str, default=",".join(GENRES))
+    ap.add_argument("--k", type=int, default=3)
+    args = ap.parse_args()
+
+    build_prediction_table(
+        Path(args.out),
+        genres=[g.strip() for g in args.genres.split(",") if g.strip()],
+        k=args.k,
+    )
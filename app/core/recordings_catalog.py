@@ -0,0 +1,158 @@
+# app/core/recordings_catalog.py
+"""
+녹음 파일 메타데이터 카탈로그(SQLite, WAL).
+
+- /api/audio/list 가 매 요청 디렉터리 전체를 stat/정렬하던 것을 인덱스 조회로 대체
+- 업로드/삭제 시 행을 추가/삭제, 목록은 (created, id) 인덱스로 keyset(cursor) 페이지네이션
+- user 컬럼으로 사용자별 필터((user, created, id) 인덱스)
+- reconcile(): 디렉터리와 동기화(카탈로그에 없는 파일 등록, 파일이 사라진 행 삭제).
+  시작 시 한 번 + CBB_RECORDINGS_RECONCILE_SEC 주기로 백그라운드 실행
+"""
+from __future__ import annotations
+import base64
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+RECORD_DIR = Path(__file__).resolve().parents[2] / "recordings"   # 프로젝트 루트/recordings
+CATALOG_DB_PATH = Path(os.environ.get("CBB_RECORDINGS_DB", str(RECORD_DIR / ".catalog.sqlite3")))
+RECONCILE_SEC = float(os.environ.get("CBB_RECORDINGS_RECONCILE_SEC", "3600"))
+MAX_PAGE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id           TEXT PRIMARY KEY,
+    user         TEXT,
+    size         INTEGER NOT NULL,
+    sha256       TEXT,
+    content_type TEXT,
+    created      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_created ON recordings(created, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_user_created ON recordings(user, created, id);
+"""
+
+
+def encode_cursor(created: float, file_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created!r}|{file_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """잘못된 커서면 ValueError."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    created, file_id = raw.split("|", 1)
+    return float(created), file_id
+
+
+class RecordingCatalog:
+    def __init__(self, db_path: Path = CATALOG_DB_PATH, record_dir: Path = RECORD_DIR):
+        self.db_path = Path(db_path)
+        self.record_dir = Path(record_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션(WAL: 읽기는 쓰기를 막지 않음)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def add(self, file_id: str, size: int, sha256: Optional[str] = None, user: Optional[str] = None,
+            content_type: Optional[str] = None, created: Optional[float] = None, replace: bool = True) -> None:
+        """replace=False 면 이미 있는 행은 건드리지 않음(reconcile 용: 업로드가 쓴 user/sha256 보존)."""
+        self._conn().execute(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO recordings "
+            "(id, user, size, sha256, content_type, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (file_id, user, int(size), sha256, content_type, created if created is not None else time.time()),
+        )
+
+    def remove(self, file_id: str) -> None:
+        self._conn().execute("DELETE FROM recordings WHERE id = ?", (file_id,))
+
+    def page(self, limit: int = 100, cursor: Optional[str] = None,
+             user: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """created 내림차순 한 페이지와 다음 커서(마지막 페이지면 None)."""
+        limit = max(1, min(int(limit), MAX_PAGE))
+        where, args = [], []
+        if user is not None:
+            where.append("user = ?")
+            args.append(user)
+        if cursor:
+            created, file_id = decode_cursor(cursor)
+            where.append("(created, id) < (?, ?)")
+            args.extend([created, file_id])
+        sql = "SELECT id, size, created, user, sha256 FROM recordings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC, id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*args, limit + 1)).fetchall()
+
+        items = [{"id": r[0], "size": r[1], "created": r[2], "user": r[3], "sha256": r[4]} for r in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def reconcile(self) -> dict:
+        """디렉터리 ↔ 카탈로그 동기화. 추가/삭제한 행 수 반환."""
+        conn = self._conn()
+        known = {r[0] for r in conn.execute("SELECT id FROM recordings")}
+        on_disk = set()
+        added = 0
+        if self.record_dir.exists():
+            with os.scandir(self.record_dir) as it:
+                for entry in it:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    on_disk.add(entry.name)
+                    if entry.name not in known:
+                        st = entry.stat()
+                        # 스냅샷 뒤에 업로드가 행을 먼저 썼으면 그대로 둔다
+                        self.add(entry.name, st.st_size, created=st.st_ctime, replace=False)
+                        added += 1
+        # 스캔 도중 업로드된 파일은 on_disk 에 없을 수 있으니 지우기 전에 한 번 더 확인
+        gone = {i for i in known - on_disk if not (self.record_dir / i).exists()}
+        if gone:
+            conn.executemany("DELETE FROM recordings WHERE id = ?", [(i,) for i in gone])
+        return {"added": added, "removed": len(gone)}
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+
+_CATALOG: Optional[RecordingCatalog] = None
+_CATALOG_LOCK = threading.Lock()
+
+
+def get_recording_catalog() -> RecordingCatalog:
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = RecordingCatalog()
+        return _CATALOG
+
+
+def start_reconciler(interval: float = RECONCILE_SEC) -> threading.Thread:
+    """시작 시 한 번, 이후 interval 초마다(0 이하면 한 번만) reconcile."""
+    def loop():
+        while True:
+            try:
+                result = get_recording_catalog().reconcile()
+                if result["added"] or result["removed"]:
+                    print(f"🗂️  recordings catalog reconciled: {result}")
+            except Exception as e:
+                print(f"⚠️  recordings catalog reconcile 실패: {e}")
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    t = threading.Thread(target=loop, name="recordings-reconcile", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,246 @@
+# app/core/render_cache.py
+"""
+업로드 MIDI 렌더 결과의 content-addressed 캐시.
+
+- 키: SHA-256(MIDI 바이트) + SF2 식별(내용 해시) + 샘플레이트 → 같은 파일을 다시 올리면 합성 생략
+  (MIDI 해시는 업로드 스트리밍 중에 계산된 값을 그대로 받을 수 있음)
+- 저장: CBB_RENDER_CACHE_DIR/<key>/audio.wav (+ audio.flac/.opus/.mp3 인코딩본)
+- 요청 측 경로(renders/, 임시 폴더)에는 하드링크(불가하면 복사) → LRU 삭제와 무관하게 계속 서빙 가능
+- single-flight: 같은 키의 동시 렌더는 프로세스 안에서는 키별 Lock, 워커 간에는 키별 lock 파일 flock 으로 한 번만 합성
+  (다른 키의 렌더는 서로 막지 않음, lock 파일은 완료 후 삭제)
+- 인덱스/카운터는 SQLite(WAL), 전체 바이트가 CBB_RENDER_CACHE_MAX_BYTES 를 넘으면 오래된 항목부터 삭제
+"""
+from __future__ import annotations
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .midi_render import get_render_service
+from . import audio_encode
+
+APP_DIR = Path(__file__).resolve().parents[1]   # .../app
+RENDER_CACHE_DIR = Path(os.environ.get("CBB_RENDER_CACHE_DIR", str(APP_DIR / "render_cache")))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("CBB_RENDER_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+RENDER_CACHE_VERSION = 2   # 렌더 방식이 바뀌면 올려서 기존 캐시 무효화
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key       TEXT PRIMARY KEY,
+    files     TEXT NOT NULL,
+    bytes     INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('shared', 0);
+"""
+
+_local = threading.local()
+_LOCKS: Dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+_SF2_IDS: Dict[Tuple[str, int, int], str] = {}
+
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(RENDER_CACHE_DIR / "index.sqlite3"), timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        conn.executescript(_SCHEMA)
+        _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def _count(name: str) -> None:
+    _conn().execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+
+def sf2_identity(sf2: Path) -> str:
+    """SF2 내용 해시(경로/크기/mtime 이 같으면 재계산하지 않음). 파일이 없으면 경로 문자열."""
+    try:
+        st = Path(sf2).stat()
+    except OSError:
+        return str(sf2)
+    ident = (str(Path(sf2).resolve()), st.st_size, st.st_mtime_ns)
+    digest = _SF2_IDS.get(ident)
+    if digest is None:
+        digest = _SF2_IDS[ident] = file_sha256(Path(sf2))
+    return digest
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def render_key(midi_sha256: str, sample_rate: int, sf2: Optional[Path] = None) -> str:
+    sf2 = sf2 or get_render_service().sf2
+    raw = f"v{RENDER_CACHE_VERSION}|{sf2_identity(sf2)}|{int(sample_rate)}|{midi_sha256}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _export(src: Path, dest: Path) -> None:
+    if dest.exists():
+        dest.unlink()
+    _link_or_copy(src, dest)
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(key, threading.Lock())
+
+
+@contextmanager
+def _key_flock(key: str):
+    """워커 간 키별 배타 잠금. 놓기 전에 lock 파일을 지워 locks/ 에 파일이 쌓이지 않게 함."""
+    locks_dir = RENDER_CACHE_DIR / "locks"
+    locks_dir.mkdir(parents=True, exist_ok=True)
+    path = locks_dir / f"{key}.lock"
+    while True:
+        lf = open(path, "a")
+        fcntl.flock(lf, fcntl.LOCK_EX)
+        try:
+            same = os.fstat(lf.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            same = False
+        if same:
+            break
+        lf.close()                 # 기다리는 동안 앞선 보유자가 파일을 지움 → 새 파일로 다시 시도
+    try:
+        yield
+    finally:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        lf.close()                 # 닫으면서 flock 해제
+
+
+def _record(key: str) -> None:
+    entry_dir = RENDER_CACHE_DIR / key
+    files = sorted(f.name for f in entry_dir.iterdir() if not f.name.startswith("."))
+    size = sum((entry_dir / f).stat().st_size for f in files)
+    _conn().execute(
+        "INSERT INTO entries (key, files, bytes, last_used) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET files = excluded.files, bytes = excluded.bytes, last_used = excluded.last_used",
+        (key, json.dumps(files), size, time.time()),
+    )
+    evict(keep=key)
+
+
+def _complete(key: str, names) -> bool:
+    return all((RENDER_CACHE_DIR / key / n).exists() for n in names)
+
+
+def _export_all(key: str, names, dest_wav: Path) -> None:
+    for n in names:
+        _export(RENDER_CACHE_DIR / key / n, dest_wav.with_suffix(Path(n).suffix))
+
+
+def _produce(key: str, midi_path: Path, sample_rate: int, fmt: str,
+             cancel: Optional[threading.Event] = None) -> None:
+    """entry 에 audio.wav(+ fmt 인코딩본)가 없으면 만든다. 호출 측이 키 잠금을 잡고 있음."""
+    entry_dir = RENDER_CACHE_DIR / key
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    wav = entry_dir / "audio.wav"
+    if not wav.exists():
+        tmp_wav = entry_dir / f".out-{uuid.uuid4().hex}.wav"
+        try:
+            get_render_service().render_wav(midi_path, tmp_wav, sample_rate=sample_rate, cancel=cancel)
+            os.replace(tmp_wav, wav)
+        finally:
+            if tmp_wav.exists():
+                tmp_wav.unlink()
+    audio_encode.encode(wav, fmt)
+
+
+def render_to(midi_path: Path, dest: Path, sample_rate: int = 48000, fmt: str = "wav",
+              cancel: Optional[threading.Event] = None, midi_sha256: Optional[str] = None) -> Path:
+    """
+    midi_path 를 렌더(캐시 히트면 재사용)해 dest(.wav)와, fmt 가 wav 가 아니면 같은 이름의 인코딩본까지 둔다.
+    fmt 에 해당하는 경로 반환. 렌더 예외(TimeoutError, RenderCancelled, CalledProcessError 등)는 그대로 전달.
+    """
+    key = render_key(midi_sha256 or file_sha256(Path(midi_path)), sample_rate)
+    names = ["audio.wav"] if fmt == "wav" else ["audio.wav", "audio" + audio_encode.FORMATS[fmt][1]]
+    dest = Path(dest).with_suffix(".wav")
+    conn = _conn()
+
+    if _complete(key, names):
+        try:
+            _export_all(key, names, dest)
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            _count("hits")
+            return audio_encode.encoded_path(dest, fmt)
+        except FileNotFoundError:
+            pass                                  # 다른 프로세스가 막 지웠음 → 미스로 처리
+
+    shared = True
+    with _key_lock(key), _key_flock(key):
+        if not _complete(key, names):
+            shared = False
+            _produce(key, Path(midi_path), sample_rate, fmt, cancel)
+            _record(key)
+        _export_all(key, names, dest)
+    with _LOCKS_GUARD:
+        _LOCKS.pop(key, None)              # 완료 후에는 파일 존재 확인만으로 충분
+    _count("shared" if shared else "misses")
+    return audio_encode.encoded_path(dest, fmt)
+
+
+def evict(max_bytes: int = RENDER_CACHE_MAX_BYTES, keep: Optional[str] = None) -> int:
+    """총 바이트가 max_bytes 이하가 될 때까지 LRU 삭제(keep 키는 제외). 삭제한 항목 수 반환."""
+    conn = _conn()
+    total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM entries").fetchone()[0]
+    removed = 0
+    while total > max_bytes:
+        row = conn.execute("SELECT key, bytes FROM entries WHERE key != ? ORDER BY last_used LIMIT 1",
+                           (keep or "",)).fetchone()
+        if row is None:
+            break
+        key, size = row
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(RENDER_CACHE_DIR / key, ignore_errors=True)   # 내보낸 하드링크는 그대로 남음
+        total -= size
+        removed += 1
+    return removed
+
+
+def render_cache_stats() -> dict:
+    conn = _conn()
+    counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries").fetchone()
+    hits, misses, shared = counters.get("hits", 0), counters.get("misses", 0), counters.get("shared", 0)
+    lookups = hits + misses + shared
+    return {
+        "entries": entries,
+        "bytes": size,
+        "maxBytes": RENDER_CACHE_MAX_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "shared": shared,            # 진행 중이던 같은 렌더를 기다려 받은 요청
+        "hitRate": ((hits + shared) / lookups) if lookups else 0.0,
+    }
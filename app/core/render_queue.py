@@ -0,0 +1,140 @@
+# app/core/render_queue.py
+"""
+async 라우트용 렌더 실행기.
+
+- 렌더(신스 합성/fluidsynth CLI)는 블로킹이라 이벤트 루프에서 직접 부르면 /health·업로드·상태 폴링까지 멈춤
+  → 전용 스레드 풀(크기 = CBB_RENDER_CONCURRENCY, 기본 CPU 코어 수 · 신스 풀 크기와 같음)에서 실행하고 await
+- 대기+실행 중 렌더가 CBB_RENDER_QUEUE_MAX 를 넘으면 QueueFullError (→ 429)
+- 큐 대기 시간(제출 → 실행 시작) 누적/최대를 기록해 /health 에 노출
+- 기다리는 동안 클라이언트 연결이 끊기면 cancel 이벤트를 set → 아직 시작 전이면 건너뛰고,
+  실행 중이면 렌더가 청크 단위로 멈춤(RenderCancelled)
+- submit(): 스레드에서 바로 제출(같은 슬롯/429/통계). 스트리밍 렌더(wav_stream)처럼 응답과 분리돼
+  도는 작업용 — 취소는 호출 측이 돌려받은 cancel 이벤트로
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Tuple
+
+from .job_queue import QueueFullError
+from .midi_render import RENDER_CONCURRENCY, RenderCancelled
+
+RENDER_QUEUE_MAX = int(os.environ.get("CBB_RENDER_QUEUE_MAX", "32"))
+DISCONNECT_POLL = 0.5   # 초
+
+
+class RenderQueue:
+    def __init__(self, concurrency: int = RENDER_CONCURRENCY, max_queue: int = RENDER_QUEUE_MAX):
+        self.concurrency = max(1, int(concurrency))
+        self.max_queue = max(self.concurrency, int(max_queue))
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="render")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._started = 0
+
+    def _job(self, fn: Callable, args: tuple, cancel: threading.Event, submitted: float):
+        waited = time.monotonic() - submitted
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._started += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            if cancel.is_set():                 # 대기 중에 요청이 사라짐 → 렌더하지 않음
+                raise RenderCancelled("render cancelled before start")
+            result = fn(*args, cancel=cancel)
+            with self._lock:
+                self._completed += 1
+            return result
+        except RenderCancelled:
+            with self._lock:
+                self._cancelled += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._queued + self._running >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError(f"render queue full ({self.max_queue})")
+            self._queued += 1
+
+    def submit(self, fn: Callable, *args) -> Tuple[Future, threading.Event]:
+        """fn(*args, cancel=Event) 를 렌더 스레드에 제출하고 (Future, cancel 이벤트) 반환. 가득 차면 QueueFullError."""
+        self._admit()
+        cancel = threading.Event()
+        return self._executor.submit(self._job, fn, args, cancel, time.monotonic()), cancel
+
+    async def run(self, fn: Callable, *args,
+                  is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None):
+        """fn(*args, cancel=Event) 를 렌더 스레드에서 실행하고 결과 반환. 끊기면 RenderCancelled."""
+        self._admit()
+        cancel = threading.Event()
+        fut = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._job, fn, args, cancel, time.monotonic())
+        try:
+            while True:
+                done, _ = await asyncio.wait({fut}, timeout=DISCONNECT_POLL)
+                if done:
+                    return fut.result()
+                if is_disconnected is not None and await is_disconnected():
+                    cancel.set()       # 시작 전이면 건너뛰고 실행 중이면 멈춤(_job 이 cancelled 로 집계)
+                    fut.add_done_callback(lambda f: f.cancelled() or f.exception())   # 결과는 버림
+                    raise RenderCancelled("client disconnected")
+        except asyncio.CancelledError:
+            cancel.set()                        # 서버 종료 등으로 핸들러 태스크가 취소됨
+            fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "concurrency": self.concurrency,
+                "maxQueue": self.max_queue,
+                "completed": self._completed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+                "avgQueueWaitMs": round(1000 * self._wait_total / self._started, 1) if self._started else 0.0,
+                "maxQueueWaitMs": round(1000 * self._wait_max, 1),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_QUEUE: Optional[RenderQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_render_queue() -> RenderQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = RenderQueue()
+        return _QUEUE
+
+
+def render_queue_stats() -> dict:
+    return _QUEUE.stats() if _QUEUE is not None else {"queued": 0, "running": 0}
+
+
+def shutdown_render_queue() -> None:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is not None:
+            _QUEUE.shutdown()
+            _QUEUE = None
@@ -1,5 +1,5 @@
 # app/core/schemas.py
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Optional
 from pydantic import BaseModel, Field
 
 Genre = Literal["rock", "jazz", "pop"]
@@ -27,4 +27,5 @@ class JobResponse(BaseModel):
 
 class StatusResponse(BaseModel):
     status: Literal["QUEUED", "RUNNING", "DONE", "ERROR"]
-    progress: int
\ No newline at end of file
+    progress: int
+    error: Optional[str] = None
\ No newline at end of file
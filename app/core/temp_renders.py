@@ -0,0 +1,114 @@
+# app/core/temp_renders.py
+"""
+업로드 MIDI 렌더(/api/audio/render-midi) 결과 임시 보관.
+
+- 렌더마다 고유 id(uuid hex) 폴더: CBB_TMP_RENDER_DIR/<id>/output.wav
+  → /api/audio/tmp/<id>.wav 는 glob 없이 경로를 바로 계산(O(1)), 이름 충돌 없음
+- 같은 워커에서 만든 항목은 메모리 인덱스(id → 경로)로 바로 찾고, 다른 워커가 만든 것은 같은 규칙의 디스크 경로로 찾음
+- janitor: CBB_TMP_RENDER_SWEEP_SEC 마다 마지막 사용(mtime) 후 CBB_TMP_RENDER_TTL 초가 지난 폴더 삭제
+  (예전 방식의 tempdir/cbb_<uuid>/ 폴더도 같은 기준으로 정리)
+"""
+from __future__ import annotations
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+TMP_RENDER_DIR = Path(os.environ.get("CBB_TMP_RENDER_DIR", str(Path(tempfile.gettempdir()) / "cbb_renders")))
+TMP_RENDER_TTL = float(os.environ.get("CBB_TMP_RENDER_TTL", "3600"))
+TMP_RENDER_SWEEP_SEC = float(os.environ.get("CBB_TMP_RENDER_SWEEP_SEC", "300"))
+OUTPUT_NAME = "output.wav"
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_INDEX: Dict[str, Path] = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def new_render() -> Tuple[str, Path]:
+    """(render_id, 작업 폴더) 생성 후 인덱스에 등록."""
+    render_id = uuid.uuid4().hex
+    work_dir = TMP_RENDER_DIR / render_id
+    work_dir.mkdir(parents=True, exist_ok=True)
+    with _INDEX_LOCK:
+        _INDEX[render_id] = work_dir / OUTPUT_NAME
+    return render_id, work_dir
+
+
+def lookup(render_id: str) -> Optional[Path]:
+    """id → 결과 wav 경로(없으면 None). 찾으면 mtime 을 갱신해 재생 중인 항목이 정리되지 않게 함."""
+    if not _ID_RE.match(render_id):
+        return None
+    with _INDEX_LOCK:
+        path = _INDEX.get(render_id)
+    path = path or TMP_RENDER_DIR / render_id / OUTPUT_NAME
+    if not path.exists():
+        return None
+    try:
+        os.utime(path.parent)
+    except OSError:
+        pass
+    return path
+
+
+def discard(render_id: str) -> None:
+    with _INDEX_LOCK:
+        _INDEX.pop(render_id, None)
+    shutil.rmtree(TMP_RENDER_DIR / render_id, ignore_errors=True)
+
+
+def sweep(ttl: float = TMP_RENDER_TTL) -> int:
+    """마지막 사용 후 ttl 초가 지난 렌더 폴더 삭제. 삭제 수 반환."""
+    cutoff = time.time() - ttl
+    removed = 0
+    legacy = Path(tempfile.gettempdir())
+    candidates = []
+    if TMP_RENDER_DIR.exists():
+        with os.scandir(TMP_RENDER_DIR) as it:
+            candidates += [(e.name, Path(e.path)) for e in it if e.is_dir()]
+    candidates += [(None, p) for p in legacy.glob("cbb_*") if _ID_RE.match(p.name[4:]) and p.is_dir()]
+    for render_id, d in candidates:
+        try:
+            if d.stat().st_mtime >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        if render_id:
+            with _INDEX_LOCK:
+                _INDEX.pop(render_id, None)
+        shutil.rmtree(d, ignore_errors=True)
+        removed += 1
+    with _INDEX_LOCK:                        # 다른 워커가 지운 항목도 인덱스에서 제거
+        for render_id in [k for k, p in _INDEX.items() if not p.parent.exists()]:
+            del _INDEX[render_id]
+    return removed
+
+
+def tmp_render_stats() -> dict:
+    with _INDEX_LOCK:
+        indexed = len(_INDEX)
+    return {"dir": str(TMP_RENDER_DIR), "ttl": TMP_RENDER_TTL, "indexed": indexed}
+
+
+def start_janitor(interval: float = TMP_RENDER_SWEEP_SEC) -> Optional[threading.Thread]:
+    """interval 초마다 sweep (0 이하면 비활성)."""
+    if interval <= 0:
+        return None
+
+    def loop():
+        while True:
+            try:
+                removed = sweep()
+                if removed:
+                    print(f"🧹 temp renders swept: {removed}")
+            except Exception as e:
+                print(f"⚠️  temp render sweep 실패: {e}")
+            time.sleep(interval)
+
+    t = threading.Thread(target=loop, name="tmp-render-janitor", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,100 @@
+# app/core/upload_stream.py
+"""
+업로드를 메모리에 통째로 올리지 않고 디스크로 스트리밍.
+
+- save_upload: UploadFile 을 청크 단위로 읽어 임시 파일에 쓰고(쓰기는 스레드로 넘김) 같은 패스에서 SHA-256 계산
+  → 녹음 dedup / 렌더 캐시 키가 추가 읽기 없이 나옴. 완료되면 os.replace 로 제자리에
+- 크기 상한은 두 단계에서 강제
+  · UploadLimitMiddleware: 요청 본문을 받는 도중 누적 바이트가 상한을 넘으면 즉시 413(Content-Length 가 크면 읽기 전에)
+  · save_upload: 파트(파일) 크기가 상한을 넘는 순간 중단하고 임시 파일 삭제
+"""
+from __future__ import annotations
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_MAX_BYTES = int(os.environ.get("CBB_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))   # nginx client_max_body_size 와 맞춤
+MIDI_MAX_BYTES = int(os.environ.get("CBB_MIDI_MAX_BYTES", str(2 * 1024 * 1024)))
+CHUNK_BYTES = 256 * 1024
+MULTIPART_SLACK = 64 * 1024     # 본문 상한 = 파일 상한 + multipart 경계/헤더 여유
+
+# 경로 → 파일 상한
+UPLOAD_LIMITS: Dict[str, int] = {
+    "/api/audio/upload": UPLOAD_MAX_BYTES,
+    "/api/audio/render-midi": MIDI_MAX_BYTES,
+    "/api/render/midi-to-wav": MIDI_MAX_BYTES,
+}
+
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(413, f"upload too large (max {limit} bytes)")
+
+
+async def save_upload(upload: UploadFile, dest: Path, max_bytes: int) -> Tuple[int, str]:
+    """upload 를 dest 로 스트리밍 저장. (바이트 수, sha256 hex) 반환, 상한 초과면 413."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.part")
+    h = hashlib.sha256()
+    size = 0
+    f = await run_in_threadpool(open, tmp, "wb")
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            h.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+        await run_in_threadpool(f.close)
+        os.replace(tmp, dest)
+    finally:
+        if not f.closed:
+            await run_in_threadpool(f.close)
+        if tmp.exists():
+            tmp.unlink()
+    return size, h.hexdigest()
+
+
+class UploadLimitMiddleware:
+    """UPLOAD_LIMITS 경로의 요청 본문을 받는 동안 크기를 세어 상한 초과 시 413."""
+
+    def __init__(self, app, limits: Dict[str, int] = UPLOAD_LIMITS):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        body_limit = limit + MULTIPART_SLACK
+
+        length = dict(scope.get("headers") or []).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > body_limit:
+            # 본문을 읽기 전에 거절
+            detail = f'{{"detail":"upload too large (max {limit} bytes)"}}'.encode()
+            await send({"type": "http.response.start", "status": 413,
+                        "headers": [(b"content-type", b"application/json"),
+                                    (b"content-length", str(len(detail)).encode())]})
+            await send({"type": "http.response.body", "body": detail})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > body_limit:
+                    raise _too_large(limit)   # 폼 파싱 중에 발생 → 라우트 예외 처리로 413 응답
+            return message
+
+        return await self.app(scope, limited_receive, send)
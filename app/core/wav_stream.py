@@ -0,0 +1,192 @@
+# app/core/wav_stream.py
+"""
+WAV 스트리밍 렌더(+ job 폴더로 tee).
+
+- 전체 길이는 MIDI 만 보고 미리 알 수 있으므로 WAV 헤더(정확한 data 크기)를 먼저 보내고
+  PCM 청크는 신스가 만드는 대로 바로 내보냄 → 긴 반복 트랙도 재생이 거의 즉시 시작
+- 렌더는 RenderQueue 슬롯에서 <wav>.part 로 기록하고, 응답은 그 파일을 따라 읽음(tail)
+  · 큐가 가득 차면 QueueFullError(→ 429), 대기 시간/취소는 render_queue_stats 에 집계
+  · 같은 워커의 동시 요청(<audio> + 파형용 fetch 등)은 한 번의 렌더를 공유
+  · 따라 읽는 응답이 모두 끊기면 렌더를 취소하고 part 파일 삭제
+  · 완료되면 os.replace 로 job 폴더의 WAV 가 됨(이후 요청은 FileResponse 로 Range 지원)
+- 렌더 실패/타임아웃이면 part 파일을 지우고 스트림을 중간에 끊음(헤더 길이보다 짧음 → 클라이언트가 감지)
+"""
+from __future__ import annotations
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from mido import MidiFile
+
+from .midi_render import RenderCancelled, get_render_service, wav_header
+from .render_queue import get_render_queue
+
+READ_CHUNK = 64 * 1024
+
+_ACTIVE: Dict[str, "_WavTee"] = {}
+_ACTIVE_GUARD = threading.Lock()
+
+
+def _total_bytes(header: bytes) -> int:
+    return len(header) + int.from_bytes(header[40:44], "little")
+
+
+def stream_length(midi_path: Path, sample_rate: int = 48000) -> int:
+    """stream_wav 가 보낼 전체 바이트 수(헤더 + PCM). 합성 없이 MIDI 만 읽어 계산 → HEAD 응답용."""
+    frames = get_render_service().pcm_frames(MidiFile(str(midi_path)), sample_rate)
+    return _total_bytes(wav_header(frames, sample_rate))
+
+
+class _WavTee:
+    """렌더 작업 1개 → part 파일, 읽는 쪽(_Follower)은 written 까지만 따라 읽음."""
+
+    def __init__(self, midi_path: Path, wav_path: Path, sample_rate: int,
+                 on_done: Optional[Callable[[Path], None]]):
+        service = get_render_service()
+        self.mid = MidiFile(str(midi_path))
+        self.wav_path = wav_path
+        self.key = str(wav_path)
+        self.sample_rate = sample_rate
+        header = wav_header(service.pcm_frames(self.mid, sample_rate), sample_rate)
+        self.total = _total_bytes(header)
+        self.part = wav_path.with_name(f".{wav_path.name}.{uuid.uuid4().hex}.part")
+        self.on_done = on_done
+        self.written = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.cond = threading.Condition()
+        self.followers = 0                  # followers/started 는 _ACTIVE_GUARD 로 보호
+        self.started = False
+        self.cancel: Optional[threading.Event] = None
+        self._f = open(self.part, "wb")     # 읽는 쪽이 바로 열 수 있도록 생성자에서 만든다
+        self._advance(header)
+
+    def _advance(self, data: bytes) -> None:
+        self._f.write(data)
+        self._f.flush()
+        with self.cond:
+            self.written += len(data)
+            self.cond.notify_all()
+
+    def _unregister(self) -> None:
+        """_ACTIVE_GUARD 안에서 호출. 같은 경로의 새 렌더가 이미 등록돼 있으면 건드리지 않음."""
+        if _ACTIVE.get(self.key) is self:
+            del _ACTIVE[self.key]
+
+    def run(self, cancel: threading.Event) -> None:
+        """렌더 큐 스레드에서 실행."""
+        try:
+            with _ACTIVE_GUARD:
+                if cancel.is_set():         # 큐에서 기다리는 사이 응답이 모두 끊김
+                    raise RenderCancelled("all listeners left before start")
+                self.started = True
+            for chunk in get_render_service().iter_pcm(self.mid, self.sample_rate, cancel=cancel):
+                self._advance(chunk)
+            self._f.close()
+            with _ACTIVE_GUARD:             # 교체와 등록 해제를 함께 → 새 요청은 완성 파일 또는 진행 중 렌더 중 하나만 봄
+                os.replace(self.part, self.wav_path)
+                self._unregister()
+        except BaseException as e:
+            self._f.close()
+            with _ACTIVE_GUARD:
+                self._unregister()
+            self.part.unlink(missing_ok=True)
+            if not isinstance(e, RenderCancelled):
+                print(f"⚠️  스트리밍 렌더 실패: {e}")
+            with self.cond:
+                self.error = e
+                self.cond.notify_all()
+            raise                           # 렌더 큐가 실패/취소로 집계
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+        if self.on_done:
+            try:
+                self.on_done(self.wav_path)
+            except Exception as e:
+                print(f"⚠️  스트리밍 렌더 후처리 실패: {e}")
+
+    def leave(self) -> None:
+        """따라 읽던 응답 하나가 끝남. 남은 응답이 없는데 렌더가 진행 중이면 취소."""
+        with _ACTIVE_GUARD:
+            self.followers -= 1
+            if self.followers > 0 or self.done or self.error is not None:
+                return
+            self._unregister()              # 이후 요청은 새 렌더를 시작
+            if self.cancel is not None:
+                self.cancel.set()
+            if self.started:
+                return                      # 실행 중인 run() 이 청크 단위로 멈추고 정리
+        self._f.close()                     # 큐 대기 중이었음 → run() 은 시작하지 않으므로 여기서 정리
+        self.part.unlink(missing_ok=True)
+
+
+class _Follower:
+    """part 파일을 written 까지 따라 읽는 iterator. 끝나거나 버려지면(GC) tee.leave()."""
+
+    def __init__(self, tee: _WavTee, f):
+        self.tee = tee
+        self.f = f                          # part 가 rename 돼도 열린 fd 는 같은 inode 를 계속 가리킴
+        self.pos = 0
+        self.closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        tee = self.tee
+        if self.closed or self.pos >= tee.total:
+            self.close()
+            raise StopIteration
+        with tee.cond:
+            while tee.written <= self.pos and not tee.done and tee.error is None:
+                tee.cond.wait(timeout=1.0)
+            available = tee.written - self.pos
+        if tee.error is not None or available <= 0:
+            self.close()
+            raise StopIteration
+        data = self.f.read(min(READ_CHUNK, available))
+        if not data:
+            self.close()
+            raise StopIteration
+        self.pos += len(data)
+        return data
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.f.close()
+            self.tee.leave()
+
+    def __del__(self):
+        self.close()
+
+
+def stream_wav(midi_path: Path, wav_path: Path, sample_rate: int = 48000,
+               on_done: Optional[Callable[[Path], None]] = None) -> Optional[Tuple[int, Iterator[bytes]]]:
+    """
+    (전체 바이트 수, 바이트 청크 iterator). 이미 진행 중인 같은 wav_path 렌더가 있으면 그걸 따라 읽는다.
+    그 사이 WAV 가 완성돼 있으면 None(→ 호출 측이 파일로 응답). 렌더 큐가 가득 차면 QueueFullError.
+    on_done(wav_path) 은 렌더가 끝나 WAV 가 제자리에 놓인 뒤 한 번 호출.
+    """
+    wav_path = Path(wav_path)
+    key = str(wav_path)
+    with _ACTIVE_GUARD:
+        tee = _ACTIVE.get(key)
+        if tee is None:
+            if wav_path.exists():
+                return None
+            wav_path.parent.mkdir(parents=True, exist_ok=True)
+            tee = _ACTIVE[key] = _WavTee(Path(midi_path), wav_path, sample_rate, on_done)
+            try:
+                _, tee.cancel = get_render_queue().submit(tee.run)
+            except BaseException:
+                tee._f.close()
+                tee._unregister()
+                tee.part.unlink(missing_ok=True)
+                raise
+        tee.followers += 1
+        reader = open(tee.part, "rb")
+    return tee.total, _Follower(tee, reader)
@@ -28,7 +28,21 @@ export function useMidiSource(navState: NavState) {
   const [cuesFromMidi, setCuesFromMidi] = useState<ChordCue[]>([])
   const [rendering, setRendering] = useState(false)
 
+  // 믹스(mergeAndExport)용 버퍼만 뒤에서 디코드 — 재생은 기다리지 않음
+  async function decodeMixBuffer(url: string) {
+    const ctx = new (window.AudioContext || (window as any).webkitAudioContext)()
+    try {
+      const wArr = await (await fetch(url)).arrayBuffer()
+      setMidiBuffer(await ctx.decodeAudioData(wArr.slice(0)))
+    } finally { await ctx.close() }
+  }
+
   async function bootstrapFromJob(jobId: string) {
+    // <audio src> 는 트랙 WAV GET(렌더하면서 스트리밍) 주소를 바로 사용
+    const wurl = navState.wavUrl ?? wavUrl(jobId)
+    setMidiAudioUrl(wurl)
+    decodeMixBuffer(wurl).catch(console.error)
+
     try {
       const midiArr = await (await fetch(navState.midiUrl ?? midiUrl(jobId))).arrayBuffer()
       const cues = await extractChordCuesFromMidi(midiArr, { preRollSec: 0, windowBeats: 1 })
@@ -44,13 +58,6 @@ export function useMidiSource(navState: NavState) {
         notes: t.notes.length,
       })))
     } catch {}
-    const wurl = navState.wavUrl ?? wavUrl(jobId)
-    setMidiAudioUrl(wurl)
-    const ctx = new (window.AudioContext || (window as any).webkitAudioContext)()
-    try {
-      const wArr = await (await fetch(wurl)).arrayBuffer()
-      setMidiBuffer(await ctx.decodeAudioData(wArr.slice(0)))
-    } finally { await ctx.close() }
   }
 
   async function handleMidiFile(file: File) {
@@ -6,9 +6,13 @@ export async function uploadBlob(blob: Blob) {
   return res.json() as Promise<{ id: string; url: string }>;
 }
 
-export async function fetchList() {
-  return fetch('/api/audio/list').then(r => r.json()) as
-         Promise<{id: string; size: number; created: string}[]>;
+export async function fetchList(cursor?: string | null, limit = 100) {
+  const qs = new URLSearchParams({ limit: String(limit) });
+  if (cursor) qs.set('cursor', cursor);
+  const res = await fetch(`/api/audio/list?${qs}`);
+  const items = await res.json() as {id: string; size: number; created: string}[];
+  // 다음 페이지 커서는 헤더로 전달(마지막 페이지면 없음)
+  return { items, nextCursor: res.headers.get('X-Next-Cursor') };
 }
 export async function deleteFile(id: string) {
   return fetch('/api/audio/' + id, { method: 'DELETE' });
@@ -8,12 +8,13 @@ export async function renderMidiOnServer(file: File): Promise<{ wavUrl: string }
 }
 
 export async function ensureWavForJob(jobId: string): Promise<string> {
-  // 1) 먼저 tracks의 wav 엔드포인트가 이미 준비돼 있는지 확인
+  // 1) HEAD 는 렌더하지 않음: 이미 있거나 GET 이 렌더하면서 스트리밍할 수 있으면 200
+  //    → 이 URL 을 <audio src> 에 바로 넣으면 렌더 완료를 기다리지 않고 재생 시작
   const url = `/api/tracks/${jobId}/wav`;
   const head = await fetch(url, { method: 'HEAD' });
   if (head.ok) return url;
 
-  // 2) 준비 안돼 있으면 서버에 jobId로 렌더 요청(파일 업로드 없음)
+  // 2) 스트리밍 불가(404: CLI 렌더 백엔드 등)면 서버에 jobId로 렌더 요청(파일 업로드 없음)
   const res = await fetch(`/api/audio/render-midi?jobId=${encodeURIComponent(jobId)}`, {
     method: 'POST'
   });
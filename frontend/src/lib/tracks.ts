@@ -7,7 +7,7 @@ export type GeneratePayload = {
 };
 
 export type JobResponse = { jobId: string };
-export type StatusResponse = { status: 'PENDING'|'RUNNING'|'DONE'|'ERROR'; progress: number };
+export type StatusResponse = { status: 'QUEUED'|'RUNNING'|'DONE'|'ERROR'; progress: number; error?: string|null };
 
 export async function generateTrack(body: GeneratePayload): Promise<JobResponse> {
   const res = await fetch('/api/tracks/generate', {
@@ -15,6 +15,7 @@ export async function generateTrack(body: GeneratePayload): Promise<JobResponse>
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
   });
+  if (res.status === 429) throw new Error('generate busy: 잠시 후 다시 시도해주세요 (429)');
   if (!res.ok) throw new Error(`generate failed: ${res.status}`);
   return res.json();
 }
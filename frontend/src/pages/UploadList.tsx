@@ -12,17 +12,25 @@ interface FileInfo {
 export default function UploadList() {
   const [files, setFiles] = useState<FileInfo[]>([])
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
 
   useEffect(() => {
     fetchList()
-      .then(list => setFiles(list))
+      .then(({ items, nextCursor }) => { setFiles(items); setNextCursor(nextCursor) })
       .finally(() => setLoading(false))
   }, [])
 
+  async function loadMore() {
+    const { items, nextCursor: next } = await fetchList(nextCursor)
+    setFiles(prev => [...prev, ...items])
+    setNextCursor(next)
+  }
+
   if (loading) return <p>로딩 중…</p>
   if (!files.length) return <p>업로드된 파일이 없습니다.</p>
 
   return (
+    <>
     <table>
       <thead>
         <tr>
@@ -57,5 +65,7 @@ export default function UploadList() {
         ))}
       </tbody>
     </table>
+    {nextCursor && <button onClick={loadMore}>더 보기</button>}
+    </>
   )
 }
\ No newline at end of file